@@ -1,16 +1,37 @@
 """The Quandify integration."""
 import logging
+from datetime import datetime, timedelta
+from typing import Any
 
 import aiohttp
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
 
-from .api import QuandifyAPI, QuandifyAPIError
-from .const import DOMAIN
+from .api import QuandifyAPIError
+from .const import (
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_ORGANIZATION_ID,
+    CONF_PUSH_UPDATES,
+    CONF_REQUEST_TIMEOUT,
+    CONF_STALE_TIMEOUT,
+    CONF_UPDATE_INTERVAL,
+    DATA_HUBS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_REQUEST_TIMEOUT_SECONDS,
+    DEFAULT_STALE_TIMEOUT_MINUTES,
+    DEFAULT_UPDATE_INTERVAL_MINUTES,
+    DISCOVERY_INTERVAL_MINUTES,
+    DOMAIN,
+    HISTORY_IMPORT_INTERVAL_HOURS,
+)
 from .coordinator import QuandifyDataUpdateCoordinator
-from .models import QuandifyDevice
+from .history import QuandifyHistoryImporter, async_remove_checkpoints
+from .hub import QuandifyHub
+from .storage import QuandifySnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,31 +39,119 @@ PLATFORMS = ["sensor", "binary_sensor", "button"]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Quandify devices from a config entry."""
-    session = async_get_clientsession(hass)
-    api = QuandifyAPI(session, dict(entry.data))
+    hub = _async_get_hub(hass, entry)
+    entry.async_on_unload(lambda: _async_release_hub(hass, entry))
+    store = QuandifySnapshotStore(hass, entry.entry_id)
 
-    try:
-        raw_devices = await api.get_devices()
-        devices = []
-        for device_data in raw_devices:
-            device = QuandifyDevice.from_api(device_data)
-            if device is not None:
-                devices.append(device)
+    if (snapshot := await store.async_load()) is not None:
+        # Create entities from the last known state and refresh in the background
+        devices, data, samples, last_success = snapshot
+        coordinator = QuandifyDataUpdateCoordinator(
+            hass, hub, devices, store=store, **_coordinator_options(entry)
+        )
+        coordinator.restore(data, samples, last_success)
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), "quandify initial refresh"
+        )
 
-    except (aiohttp.ClientError, ValueError, QuandifyAPIError) as err:
-        _LOGGER.error("Failed to set up Quandify integration during device fetch: %s", err)
-        raise ConfigEntryNotReady(f"Failed to get devices: {err}") from err
+    else:
+        try:
+            # A bulk first refresh reuses this listing through the hub cache
+            devices = [device for device, _ in (await hub.async_list_devices()).values()]
 
-    coordinator = QuandifyDataUpdateCoordinator(hass, api, devices)
-    await coordinator.async_config_entry_first_refresh()
+        except (aiohttp.ClientError, ValueError, QuandifyAPIError) as err:
+            _LOGGER.error("Failed to set up Quandify integration during device fetch: %s", err)
+            raise ConfigEntryNotReady(f"Failed to get devices: {err}") from err
+
+        coordinator = QuandifyDataUpdateCoordinator(
+            hass, hub, devices, store=store, **_coordinator_options(entry)
+        )
+        await coordinator.async_config_entry_first_refresh()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    # Only one entry of the organization polls, the others get its results
+    entry.async_on_unload(hub.async_add_coordinator(coordinator))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    options = dict(entry.options)
+
+    async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+        nonlocal options
+        # Saving refreshed tokens updates the entry as well
+        if entry.options == options:
+            return
+        options = dict(entry.options)
+        coordinator.async_update_options(**_coordinator_options(entry))
+
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+
+    history = QuandifyHistoryImporter(hass, coordinator, entry)
+    await history.async_load()
+    history.async_schedule_import()
+
+    async def _async_discover_devices(_now: datetime) -> None:
+        await coordinator.async_discover_devices()
+
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            _async_discover_devices,
+            timedelta(minutes=DISCOVERY_INTERVAL_MINUTES),
+            name=f"{DOMAIN} device discovery",
+        )
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            history.async_schedule_import,
+            timedelta(hours=HISTORY_IMPORT_INTERVAL_HOURS),
+            name=f"{DOMAIN} history import",
+        )
+    )
+
     return True
 
 
+def _coordinator_options(entry: ConfigEntry) -> dict[str, Any]:
+    """Return the coordinator settings from the entry's options."""
+    options = entry.options
+    return {
+        "max_concurrent_requests": options.get(
+            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+        ),
+        "request_timeout": options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT_SECONDS),
+        "max_poll_interval": options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL_MINUTES)
+        * 60,
+        "stale_timeout": timedelta(
+            minutes=options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT_MINUTES)
+        ),
+        "push_updates": options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES),
+    }
+
+
+def _async_get_hub(hass: HomeAssistant, entry: ConfigEntry) -> QuandifyHub:
+    """Return the hub of the entry's organization, creating it for its first entry."""
+    hubs: dict[str, QuandifyHub] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_HUBS, {})
+    organization_id = entry.data.get(CONF_ORGANIZATION_ID) or entry.entry_id
+    if (hub := hubs.get(organization_id)) is None:
+        hub = hubs[organization_id] = QuandifyHub(
+            hass, async_get_clientsession(hass), dict(entry.data)
+        )
+    else:
+        _LOGGER.debug("Sharing the Quandify API client of organization %s", organization_id)
+    hub.add_entry(entry)
+    return hub
+
+
+def _async_release_hub(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Detach the entry from its hub, removing the hub after its last entry."""
+    hubs: dict[str, QuandifyHub] = hass.data[DOMAIN][DATA_HUBS]
+    organization_id = entry.data.get(CONF_ORGANIZATION_ID) or entry.entry_id
+    if hubs[organization_id].remove_entry(entry):
+        del hubs[organization_id]
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -51,3 +160,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshot and history checkpoints when a config entry is removed."""
+    await QuandifySnapshotStore(hass, entry.entry_id).async_remove()
+    await async_remove_checkpoints(hass, entry.entry_id)
@@ -1,32 +1,338 @@
 """Quandify API client."""
+import asyncio
+import base64
+import heapq
+import itertools
 import json
 import logging
-from typing import Any
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, TypeVar
 
 import aiohttp
+from yarl import URL
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
 from .const import API_BASE_URL, AUTH_BASE_URL
-from .const import FIREBASE_API_KEY, FIREBASE_AUTH_BASE_URL
+from .const import FIREBASE_API_KEY, FIREBASE_AUTH_BASE_URL, FIREBASE_TOKEN_URL
 from .const import CONF_ACCOUNT_ID, CONF_ID_TOKEN, CONF_REFRESH_TOKEN, CONF_ORGANIZATION_ID
+from .const import CONF_FIREBASE_REFRESH_TOKEN
+from .const import DEVICE_PAGE_SIZE, TOKEN_REFRESH_MARGIN_SECONDS
+from .const import CIRCUIT_BREAKER_FAILURE_THRESHOLD, CIRCUIT_BREAKER_RESET_SECONDS
+from .const import REQUEST_MAX_RETRIES, RETRY_BACKOFF_BASE_SECONDS, RETRY_BACKOFF_MAX_SECONDS
+from .const import REQUEST_BURST, REQUEST_RATE_PER_SECOND
+from .flight_recorder import record_request, record_token_refresh
+from .metrics import QuandifyMetrics
+from .models import QuandifyDevice, QuandifyDeviceState
 
 _LOGGER = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying after a delay
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# HTTP statuses with which a token endpoint rejects the refresh token itself
+REJECTED_TOKEN_STATUSES = frozenset({400, 401, 403})
+
+# Request priorities, highest first
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+PRIORITY_BACKGROUND = 2
+
+_T = TypeVar("_T")
+
+# Loop time by which the requests of the current task must finish, see request_deadline
+_request_deadline: ContextVar[float | None] = ContextVar(
+    "quandify_request_deadline", default=None
+)
+
 class QuandifyAPIError(Exception):
     """Generic Quandify API exception."""
 
+class QuandifyCircuitOpenError(QuandifyAPIError):
+    """Raised when requests to a host are suspended after repeated failures."""
+
+class QuandifyRetryLaterError(QuandifyAPIError):
+    """Raised when a request can only be retried after a delay the caller cannot wait for."""
+
+    def __init__(self, message: str, retry_after: float):
+        """Initialize with the number of seconds after which to try again."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@asynccontextmanager
+async def request_deadline(timeout: float) -> AsyncIterator[None]:
+    """Bound the requests made in the block, including their retries, to ``timeout`` seconds.
+
+    A retry whose backoff or Retry-After delay would end past the deadline
+    is not waited for; QuandifyRetryLaterError is raised right away instead.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    if (outer := _request_deadline.get()) is not None:
+        deadline = min(deadline, outer)
+    token = _request_deadline.set(deadline)
+    try:
+        async with asyncio.timeout_at(deadline):
+            yield
+    finally:
+        _request_deadline.reset(token)
+
+
+class CircuitBreaker:
+    """Stop calling a host after repeated transient failures, then probe for recovery."""
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_BREAKER_RESET_SECONDS,
+    ):
+        """Initialize the circuit breaker in the closed state."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        """Return True if requests are currently suspended."""
+        return self.opened_at is not None
+
+    def before_request(self) -> None:
+        """Raise if the circuit is open, letting a single probe through per reset timeout."""
+        if self.opened_at is None:
+            return
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_timeout:
+            raise QuandifyCircuitOpenError("Quandify API unavailable, requests suspended")
+        # Restart the window so concurrent callers wait for the probe's outcome
+        self.opened_at = now
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful request."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a transient failure, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                _LOGGER.warning(
+                    "Suspending Quandify API requests for %s s after %d failures",
+                    self.reset_timeout,
+                    self.failures,
+                )
+            self.opened_at = time.monotonic()
+
+
+class RequestScheduler:
+    """Pace requests with a token bucket, serving waiting requests by priority.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float = REQUEST_RATE_PER_SECOND, burst: int = REQUEST_BURST):
+        """Initialize the scheduler with a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: int = PRIORITY_POLL) -> None:
+        """Wait until a request of the given priority may be sent."""
+        if self.rate <= 0:
+            return
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a token just before being cancelled, hand it back
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._release()
+            raise
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule(self) -> None:
+        """Wake up when the next token is available, if anyone is waiting."""
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        """Hand out the tokens that became available."""
+        self._timer = None
+        self._release()
+
+    def _release(self) -> None:
+        """Grant tokens to waiting requests in priority order."""
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+
+class InFlightRequests:
+    """Run identical concurrent requests once and share the result.
+
+    A shared request is only cancelled once every caller waiting for it is.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with nothing in flight."""
+        self._tasks: dict[Hashable, asyncio.Task[Any]] = {}
+        self._waiters: Counter[Hashable] = Counter()
+
+    async def run(self, key: Hashable, request: Callable[[], Awaitable[_T]]) -> _T:
+        """Run ``request``, or join the one already in flight under ``key``."""
+        if (task := self._tasks.get(key)) is None:
+            task = self._tasks[key] = asyncio.ensure_future(request())
+            task.add_done_callback(lambda _: self._forget(key, task))
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    task.cancel()
+                    self._forget(key, task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Stop sharing a request that completed or was cancelled."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+
+def _retry_after(headers: Any) -> float | None:
+    """Return the delay requested by a Retry-After header, in seconds."""
+    if not headers or (value := headers.get("Retry-After")) is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _refresh_method(request: Callable[..., Any]) -> str:
+    """Return the short name of a token refresh method, such as "firebase"."""
+    return request.__name__.removeprefix("_async_").removesuffix("_refresh")
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Return an exponential backoff delay with full jitter for a retry attempt."""
+    return random.uniform(
+        0, min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
 class QuandifyAPI:
     """A class for interacting with the Quandify API."""
 
-    def __init__(self, session: aiohttp.ClientSession, config: dict[str, Any]):
-        """Initialize the API client."""
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        config: dict[str, Any],
+        token_listener: Callable[[], None] | None = None,
+        api_base_url: str = API_BASE_URL,
+        auth_base_url: str = AUTH_BASE_URL,
+        firebase_auth_base_url: str = FIREBASE_AUTH_BASE_URL,
+        firebase_token_url: str = FIREBASE_TOKEN_URL,
+        scheduler: RequestScheduler | None = None,
+    ):
+        """Initialize the API client.
+
+        The base URLs default to the Quandify cloud and can be pointed at a
+        local stand-in, such as scripts/mock_cloud.py. Requests are paced by
+        ``scheduler``, a default rate limited one unless given.
+        """
         self.session = session
         self._config = config
+        self._api_base_url = api_base_url
+        self._auth_base_url = auth_base_url
+        self._firebase_auth_base_url = firebase_auth_base_url
+        self._firebase_token_url = firebase_token_url
+        self._token_listener = token_listener
+        self._refresh_task: asyncio.Task[bool] | None = None
+        self._refresh_timer: asyncio.TimerHandle | None = None
+        self._refresh_timer_token: str | None = None
+        self._circuit_breakers: dict[str | None, CircuitBreaker] = {}
+        self.scheduler = scheduler or RequestScheduler()
+        self._gets = InFlightRequests()
+        self.metrics = QuandifyMetrics()
+
+    def shutdown(self) -> None:
+        """Cancel any scheduled background token refresh."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+            self._refresh_timer_token = None
+
+    def use_config(self, config: dict[str, Any]) -> None:
+        """Switch to the account and tokens of another config entry."""
+        self.shutdown()
+        self._config = config
+
+    @property
+    def tokens(self) -> dict[str, Any]:
+        """Return the current ID token and the Quandify and Firebase refresh tokens."""
+        return {
+            CONF_ID_TOKEN: self._config.get(CONF_ID_TOKEN),
+            CONF_REFRESH_TOKEN: self._config.get(CONF_REFRESH_TOKEN),
+            CONF_FIREBASE_REFRESH_TOKEN: self._config.get(CONF_FIREBASE_REFRESH_TOKEN),
+        }
+
+    @property
+    def token_expires_at(self) -> float | None:
+        """Return the expiry of the current ID token as a UNIX timestamp, if known."""
+        token = self._config.get(CONF_ID_TOKEN)
+        if not token:
+            return None
+
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return float(claims["exp"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
 
     async def _firebase_auth(self, email: str, password: str) -> dict[str, Any]:
         """Perform the full Firebase authentication flow to get all necessary IDs."""
         try:
             signin_url = (
-                f"{FIREBASE_AUTH_BASE_URL}"
+                f"{self._firebase_auth_base_url}"
                 f"/accounts:signInWithPassword"
                 f"?key={FIREBASE_API_KEY}"
             )
@@ -42,7 +348,7 @@ class QuandifyAPI:
             signin_data = await response.json()
             firebase_id_token = signin_data["idToken"]
 
-            lookup_url = f"{FIREBASE_AUTH_BASE_URL}/accounts:lookup?key={FIREBASE_API_KEY}"
+            lookup_url = f"{self._firebase_auth_base_url}/accounts:lookup?key={FIREBASE_API_KEY}"
             lookup_payload = {"idToken": firebase_id_token}
             response = await self.session.post(lookup_url, json=lookup_payload)
             response.raise_for_status()
@@ -62,6 +368,12 @@ class QuandifyAPI:
                 "refresh_token": signin_data["refreshToken"],
             }
 
+        except aiohttp.ClientResponseError as err:
+            if err.status in REJECTED_TOKEN_STATUSES:
+                raise ConfigEntryAuthFailed("Invalid email or password") from err
+            _LOGGER.error("An error occurred during authentication: %s", err)
+            raise QuandifyAPIError(f"Authentication error: {err}") from err
+
         except aiohttp.ClientError as err:
             _LOGGER.error("A connection error occurred during authentication: %s", err)
             raise QuandifyAPIError(f"Connection error: {err}") from err
@@ -77,6 +389,7 @@ class QuandifyAPI:
             if not self._config.get(CONF_ACCOUNT_ID):
                 f_base = await self._firebase_auth(email, password)
                 self._config[CONF_ACCOUNT_ID] = f_base["account_id"]
+                self._config[CONF_FIREBASE_REFRESH_TOKEN] = f_base["refresh_token"]
 
         except (aiohttp.ClientError, ValueError) as err:
             _LOGGER.error("Failed to authenticate via Firebase: %s", err)
@@ -88,6 +401,12 @@ class QuandifyAPI:
                 self._config[CONF_REFRESH_TOKEN] = auth_data["refresh_token"]
                 self._config[CONF_ID_TOKEN] = auth_data["id_token"]
 
+        except aiohttp.ClientResponseError as err:
+            if err.status in REJECTED_TOKEN_STATUSES:
+                raise ConfigEntryAuthFailed("Invalid password") from err
+            _LOGGER.error("Failed to authenticate to Quandify API: %s", err)
+            raise QuandifyAPIError("Failed to authenticate to Quandify API") from err
+
         except (aiohttp.ClientError, ValueError) as err:
             _LOGGER.error("Failed to authenticate to Quandify API: %s", err)
             raise QuandifyAPIError("Failed to authenticate to Quandify API") from err
@@ -103,60 +422,245 @@ class QuandifyAPI:
         return self._config
 
     async def _refresh_token(self) -> bool:
-        """Refresh the authentication token."""
-
-        url = f"{AUTH_BASE_URL}/refresh"
-        payload = {"refresh_token": self._config.get(CONF_REFRESH_TOKEN)}
-
+        """Refresh the authentication token.
+
+        The Quandify refresh token is first sent to Quandify's refresh
+        endpoint and, if that fails, the Firebase refresh token from the
+        sign-in is exchanged with Firebase's secure token service, one
+        request each. The exchange is skipped without a Firebase refresh
+        token. Only if every attempt rejects its refresh token is
+        ConfigEntryAuthFailed raised, which leads to reauthentication; if
+        one failed for another reason, QuandifyAPIError is raised instead.
+        """
+        rejected = True
+        error: Exception | None = None
+
+        for request, token_key in (
+            (self._async_quandify_refresh, CONF_REFRESH_TOKEN),
+            (self._async_firebase_refresh, CONF_FIREBASE_REFRESH_TOKEN),
+        ):
+            if not (refresh_token := self._config.get(token_key)):
+                continue
+            try:
+                id_token, new_refresh_token = await request(refresh_token)
+            except aiohttp.ClientResponseError as err:
+                rejected = rejected and err.status in REJECTED_TOKEN_STATUSES
+                error = err
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as err:
+                rejected = False
+                error = err
+            else:
+                record_token_refresh(_refresh_method(request))
+                self._config[CONF_ID_TOKEN] = id_token
+                self._config[token_key] = new_refresh_token
+                if self._token_listener is not None:
+                    self._token_listener()
+                return True
+            record_token_refresh(_refresh_method(request), error)
+            _LOGGER.debug("Token refresh through %s failed: %s", request.__name__, error)
+
+        _LOGGER.error("Failed to refresh token: %s", error)
+        if rejected:
+            raise ConfigEntryAuthFailed("Refresh token was rejected") from error
+        raise QuandifyAPIError(f"Failed to refresh token: {error}") from error
+
+    async def _async_quandify_refresh(self, refresh_token: str) -> tuple[str, str]:
+        """Get new tokens from Quandify's refresh endpoint."""
+        url = f"{self._auth_base_url}/refresh"
+        payload = {"refresh_token": refresh_token}
+        _LOGGER.debug("Attempting to refresh token")
+        response = await self._timed_request("refresh_token", "post", url, json=payload)
+        data: dict[str, Any] = await response.json()
+        return data["id_token"], data["refresh_token"]
+
+    async def _async_firebase_refresh(self, refresh_token: str) -> tuple[str, str]:
+        """Exchange the Firebase refresh token for new tokens with its secure token service."""
+        payload = {"grant_type": "refresh_token", "refresh_token": refresh_token}
+        _LOGGER.debug("Attempting to exchange the refresh token with Firebase")
+        response = await self._timed_request(
+            "firebase_refresh_token", "post", self._firebase_token_url, data=payload
+        )
+        data: dict[str, Any] = await response.json()
+        return data["id_token"], data["refresh_token"]
+
+    async def _async_refresh_token_shared(self) -> bool:
+        """Refresh the token, sharing a single in-flight refresh between all callers."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_token())
+        return await asyncio.shield(self._refresh_task)
+
+    async def _async_ensure_token(self) -> None:
+        """Refresh the token up front if it is about to expire, otherwise schedule it."""
+        expires_at = self.token_expires_at
+        if expires_at is None:
+            return
+
+        delay = expires_at - TOKEN_REFRESH_MARGIN_SECONDS - time.time()
+        if delay <= 0:
+            _LOGGER.debug("Token is about to expire, refreshing before request")
+            await self._async_refresh_token_shared()
+            return
+
+        token = self._config.get(CONF_ID_TOKEN)
+        if self._refresh_timer_token != token:
+            self.shutdown()
+            self._refresh_timer = asyncio.get_running_loop().call_later(
+                delay, self._start_background_refresh
+            )
+            self._refresh_timer_token = token
+
+    def _start_background_refresh(self) -> None:
+        """Refresh the token in the background shortly before it expires."""
+        self._refresh_timer = None
+        self._refresh_timer_token = None
+        _LOGGER.debug("Refreshing token in the background ahead of expiry")
+        task = asyncio.ensure_future(self._async_refresh_token_shared())
+        task.add_done_callback(self._background_refresh_done)
+
+    @staticmethod
+    def _background_refresh_done(task: "asyncio.Future[bool]") -> None:
+        """Log the outcome of a background token refresh."""
+        if not task.cancelled() and (err := task.exception()) is not None:
+            _LOGGER.warning("Background token refresh failed: %s", err)
+
+    async def _timed_request(
+        self, endpoint: str, method: str, url: str, **kwargs: Any
+    ) -> aiohttp.ClientResponse:
+        """Send a request and read its body, recording latency, size and outcome."""
+        start = time.monotonic()
+        size = 0
+        status: int | None = None
         try:
-            _LOGGER.debug("Attempting to refresh token")
-            response = await self.session.post(url, json=payload)
+            response = await self.session.request(method, url, **kwargs)
+            status = response.status
+            size = len(await response.read())
             response.raise_for_status()
-            data: dict[str, Any] = await response.json()
-
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Failed to refresh token: %s", err)
-            raise ConfigEntryAuthFailed("Failed to refresh token") from err
-
-        else:
-            self._config[CONF_ID_TOKEN] = data["id_token"]
-            self._config[CONF_REFRESH_TOKEN] = data["refresh_token"]
-
-        return True
+        except BaseException as err:
+            duration = time.monotonic() - start
+            self.metrics.record_request(endpoint, duration, size, True)
+            record_request(endpoint, status, start, duration, size, err)
+            raise
+        duration = time.monotonic() - start
+        self.metrics.record_request(endpoint, duration, size, False)
+        record_request(endpoint, status, start, duration, size)
+        return response
 
     async def _request(
         self,
         method: str,
         url: str,
-        retry: bool = True,
+        endpoint: str = "request",
+        priority: int = PRIORITY_POLL,
         **kwargs: Any
     ) -> dict[str, Any]:
-        """Make an authenticated request to the Quandify API, refreshing the token if needed."""
+        """Make an authenticated request, sharing identical GET requests in flight."""
+        if method != "get":
+            return await self._send_request(method, url, True, endpoint, priority, **kwargs)
 
-        headers = {"Authorization": f"Bearer {self._config.get(CONF_ID_TOKEN)}"}
-        response = {}
+        key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+        return await self._gets.run(
+            key, lambda: self._send_request(method, url, True, endpoint, priority, **kwargs)
+        )
 
-        try:
-            response = await self.session.request(method, url, headers=headers, **kwargs)
-            response.raise_for_status()
-            if response.content_type == "application/json":
-                return await response.json()
-            else:
-                return await response.text()
+    async def _send_request(
+        self,
+        method: str,
+        url: str,
+        retry: bool,
+        endpoint: str,
+        priority: int,
+        **kwargs: Any
+    ) -> dict[str, Any]:
+        """Make an authenticated request to the Quandify API, refreshing the token if needed.
+
+        Every attempt waits for the request scheduler. Transient failures are
+        retried with exponential backoff, honoring Retry-After on 429, and
+        repeated failures open the host's circuit breaker. A delay that would
+        outlast the caller's request_deadline, or a Retry-After beyond the
+        longest backoff, raises QuandifyRetryLaterError instead of waiting.
+        """
+
+        breaker = self._circuit_breakers.setdefault(URL(url).host, CircuitBreaker())
+
+        for attempt in range(REQUEST_MAX_RETRIES + 1):
+            breaker.before_request()
+            await self.scheduler.acquire(priority)
+            await self._async_ensure_token()
+            token = self._config.get(CONF_ID_TOKEN)
+            headers = {"Authorization": f"Bearer {token}"}
+
+            try:
+                response = await self._timed_request(
+                    endpoint, method, url, headers=headers, **kwargs
+                )
+                if response.content_type == "application/json":
+                    result = await response.json()
+                else:
+                    result = await response.text()
+
+            except aiohttp.ClientResponseError as err:
+                if err.status not in TRANSIENT_STATUSES:
+                    breaker.record_success()
+
+                    # Check if the error is 401 Unauthorized and we are allowed to retry once.
+                    if err.status == 401 and retry:
+                        if self._config.get(CONF_ID_TOKEN) != token:
+                            _LOGGER.debug("Token was refreshed by another request, retrying")
+                            return await self._send_request(
+                                method, url, False, endpoint, priority, **kwargs
+                            )
+
+                        _LOGGER.info("Token expired or invalid, attempting refresh")
+                        if await self._async_refresh_token_shared():
+                            _LOGGER.info("Token refreshed, retrying the request")
+                            return await self._send_request(
+                                method, url, False, endpoint, priority, **kwargs
+                            )
+
+                    raise
+
+                breaker.record_failure()
+                error: Exception = err
+                delay = _retry_after(err.headers) if err.status == 429 else None
+                if delay is not None and delay > RETRY_BACKOFF_MAX_SECONDS:
+                    raise QuandifyRetryLaterError(
+                        f"Rate limited, retry after {delay:.0f} s", delay
+                    ) from err
+                if attempt == REQUEST_MAX_RETRIES:
+                    raise
+                if delay is None:
+                    delay = _backoff_delay(attempt)
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                breaker.record_failure()
+                if attempt == REQUEST_MAX_RETRIES:
+                    raise
+                error = err
+                delay = _backoff_delay(attempt)
 
-        except aiohttp.ClientResponseError as err:
-            # Check if the error is 401 Unauthorized and we are allowed to retry once.
-            if err.status == 401 and retry:
-                _LOGGER.info("Token expired or invalid, attempting refresh")
-                if await self._refresh_token():
-                    _LOGGER.info("Token refreshed, retrying the request")
-                    return await self._request(method, url, retry=False, **kwargs)
+            else:
+                breaker.record_success()
+                return result
+
+            # Fail now rather than be cancelled by the caller's deadline mid-wait
+            if (deadline := _request_deadline.get()) is not None and (
+                asyncio.get_running_loop().time() + delay >= deadline
+            ):
+                raise QuandifyRetryLaterError(
+                    f"Request failed, retry after {delay:.1f} s: {error}", delay
+                ) from error
+
+            _LOGGER.debug(
+                "Transient error on %s %s, retrying in %.1f s (attempt %d of %d)",
+                method.upper(), url, delay, attempt + 1, REQUEST_MAX_RETRIES,
+            )
+            await asyncio.sleep(delay)
 
-            raise
+        raise QuandifyAPIError(f"Request failed: {method.upper()} {url}")
 
     async def auth(self, account_id: str, password: str) -> dict[str, Any]:
         """Authenticate to the Quandify API."""
-        url = f"{AUTH_BASE_URL}/"
+        url = f"{self._auth_base_url}/"
         payload = {"account_id": account_id, "password": password}
         _LOGGER.debug("Attempting to authenticate to %s", url)
         response = await self.session.post(url, json=payload)
@@ -166,8 +670,8 @@ class QuandifyAPI:
     async def get_organization_id(self) -> str:
         """Fetch account details to get the organizationId."""
         account_id = self._config.get(CONF_ACCOUNT_ID)
-        url = f"{AUTH_BASE_URL}/accounts/{account_id}"
-        response = await self._request("get", url)
+        url = f"{self._auth_base_url}/accounts/{account_id}"
+        response = await self._request("get", url, endpoint="get_organization_id")
         organization_id = response.get("organizationId")
 
         if not organization_id:
@@ -176,46 +680,165 @@ class QuandifyAPI:
         return organization_id
 
     async def get_devices(self) -> list[dict[str, Any]]:
-        """Fetch the list of devices."""
+        """Fetch the list of devices, all pages of it."""
+        return [
+            device_data
+            async for page in self.iter_device_pages()
+            for device_data in page
+        ]
+
+    async def iter_device_pages(
+        self, page_size: int = DEVICE_PAGE_SIZE, priority: int = PRIORITY_POLL
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yield the device list one page of device payloads at a time.
+
+        The next page is only requested once the caller is done with the
+        current one, so a large organization is never decoded all at once.
+        """
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
         )
-        response = await self._request("get", url)
-        return response.get("data", [])
+        params: dict[str, Any] = {"limit": page_size}
+
+        while True:
+            response = await self._request(
+                "get", url, endpoint="get_devices", priority=priority, params=params
+            )
+            yield response.get("data", [])
+            if not (cursor := response.get("next")):
+                return
+            params = {**params, "cursor": cursor}
+
+    async def iter_devices(
+        self, priority: int = PRIORITY_POLL
+    ) -> AsyncIterator[tuple[QuandifyDevice, QuandifyDeviceState | None]]:
+        """Yield each supported device as its page arrives, with its state if the list has it.
+
+        The state is None unless the list has every field the state is read
+        from, so a device with a partial entry is fetched on its own instead.
+        """
+        async for page in self.iter_device_pages(priority=priority):
+            for device_data in page:
+                if (device := QuandifyDevice.from_api(device_data)) is None:
+                    continue
+                if QuandifyDeviceState.is_complete(device_data):
+                    yield device, QuandifyDeviceState.from_api(device_data)
+                else:
+                    yield device, None
 
     async def get_device_info(self, device_id: str) -> dict[str, Any]:
         """Get all info for a single device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}"
         )
-        return await self._request("get", url)
+        return await self._request("get", url, endpoint="get_device_info")
+
+    async def iter_events(self, idle_timeout: float) -> AsyncIterator[dict[str, Any] | None]:
+        """Yield device updates from the organization's event stream.
+
+        The stream is read as server-sent events whose data is a partial
+        device payload including its ``id``. None is yielded once the stream
+        is open and for every keepalive comment, so the caller can tell the
+        stream is alive. Raises TimeoutError if nothing arrives within
+        ``idle_timeout`` seconds, and QuandifyAPIError if the token was
+        rejected, after refreshing it for the next connection.
+        """
+        await self._async_ensure_token()
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = f"{self._api_base_url}/organization/{organization_id}/events"
+        headers = {
+            "Authorization": f"Bearer {self._config.get(CONF_ID_TOKEN)}",
+            "Accept": "text/event-stream",
+        }
+
+        async with self.session.get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(total=None)
+        ) as response:
+            if response.status == 401:
+                await self._async_refresh_token_shared()
+                raise QuandifyAPIError("Event stream rejected the token")
+            response.raise_for_status()
+            yield None
+
+            data: list[str] = []
+            while True:
+                async with asyncio.timeout(idle_timeout):
+                    line = await response.content.readline()
+                if not line:
+                    return
+                text = line.decode().rstrip("\r\n")
+                if not text:
+                    if data:
+                        yield json.loads("\n".join(data))
+                        data.clear()
+                elif text.startswith(":"):
+                    yield None
+                else:
+                    field, _, value = text.partition(":")
+                    if field == "data":
+                        data.append(value.removeprefix(" "))
+
+    async def iter_volume_history(
+        self, device_id: str, start: datetime, end: datetime
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the total volume samples of a device between start and end, page by page.
+
+        Each sample is a dict with "timestamp" and "total_volume". Only one
+        page of samples is held in memory at a time.
+        """
+        organization_id = self._config.get(CONF_ORGANIZATION_ID)
+        url = (
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
+            f"{device_id}/history/volume"
+        )
+        params = {"from": start.isoformat(), "to": end.isoformat()}
+
+        while True:
+            response = await self._request(
+                "get",
+                url,
+                endpoint="get_volume_history",
+                priority=PRIORITY_BACKGROUND,
+                params=params,
+            )
+            for sample in response.get("data", []):
+                yield sample
+            if not (cursor := response.get("next")):
+                return
+            params = {**params, "cursor": cursor}
 
     async def acknowledge_leak(self, device_id: str) -> None:
         """Acknowledge a leak."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/acknowledge-alarm"
         )
-        await self._request("post", url)
+        await self._request(
+            "post", url, endpoint="acknowledge_leak", priority=PRIORITY_COMMAND
+        )
 
     async def open_valve(self, device_id: str) -> None:
         """Open the valve on a device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/open-valve"
         )
-        await self._request("post", url)
+        await self._request(
+            "post", url, endpoint="open_valve", priority=PRIORITY_COMMAND
+        )
 
     async def close_valve(self, device_id: str) -> None:
         """Close the valve on a device."""
         organization_id = self._config.get(CONF_ORGANIZATION_ID)
         url = (
-            f"{API_BASE_URL}/organization/{organization_id}/devices/"
+            f"{self._api_base_url}/organization/{organization_id}/devices/"
             f"{device_id}/commands/close-valve"
         )
-        await self._request("post", url)
+        await self._request(
+            "post", url, endpoint="close_valve", priority=PRIORITY_COMMAND
+        )
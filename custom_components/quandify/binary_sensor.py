@@ -11,7 +11,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .entity import QuandifyEntity
+from .entity import QuandifyEntity, state_getter
 from .models import QuandifyDevice
 
 # Binary Sensor descriptions
@@ -28,14 +28,18 @@ DEVICE_BINARY_SENSORS = {
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the binary sensor entities."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[QuandifyBinarySensor] = []
 
-    for device in coordinator.devices:
-        if descriptions := DEVICE_BINARY_SENSORS.get(device.model):
-            entities.extend(
-                QuandifyBinarySensor(coordinator, device, description) for description in descriptions
-            )
-    async_add_entities(entities)
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        entities: list[QuandifyBinarySensor] = []
+        for device in devices:
+            if descriptions := DEVICE_BINARY_SENSORS.get(device.model):
+                entities.extend(
+                    QuandifyBinarySensor(coordinator, device, description) for description in descriptions
+                )
+        async_add_entities(entities)
+
+    entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
 class QuandifyBinarySensor(QuandifyEntity, BinarySensorEntity):
     """Implementation of a Quandify binary sensor."""
 
@@ -44,27 +48,15 @@ class QuandifyBinarySensor(QuandifyEntity, BinarySensorEntity):
         super().__init__(coordinator, device)
         self.entity_description = description
         self._attr_unique_id = f"{self.device.id}_{self.entity_description.key}"
+        self._get_value = state_getter(self.entity_description.key)
         self._update_attr()
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._update_attr()
-        super()._handle_coordinator_update()
-
-    def _update_attr(self) -> None:
-        """Update the state of the binary sensor."""
-        value = self.device_data
-        if value is None:
-            self._attr_is_on = None
-            return
-
-        try:
-            for key_part in self.entity_description.key.split("."):
-                if value is None:
-                    break
-                value = value.get(key_part)
-        except AttributeError:
-            value = None
+    def _update_attr(self) -> bool:
+        """Update the state of the binary sensor, returning True if it changed."""
+        state = self.device_state
+        is_on = self._get_value(state) is True if state is not None else None
 
-        self._attr_is_on = value is True
+        if is_on == self._attr_is_on:
+            return False
+        self._attr_is_on = is_on
+        return True
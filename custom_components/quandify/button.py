@@ -3,10 +3,11 @@ import logging
 import aiohttp
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .api import QuandifyAPIError
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
 from .entity import QuandifyEntity
@@ -21,18 +22,21 @@ DEVICE_BUTTONS = {
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the button entities based on device class."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[ButtonEntity] = []
 
-    for device in coordinator.devices:
-        if button_types := DEVICE_BUTTONS.get(device.model):
-            if "acknowledge" in button_types:
-                entities.append(QuandifyAcknowledgeLeakButton(coordinator, device))
-            if "open_valve" in button_types:
-                entities.append(QuandifyOpenValveButton(coordinator, device))
-            if "close_valve" in button_types:
-                entities.append(QuandifyCloseValveButton(coordinator, device))
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        entities: list[ButtonEntity] = []
+        for device in devices:
+            if button_types := DEVICE_BUTTONS.get(device.model):
+                if "acknowledge" in button_types:
+                    entities.append(QuandifyAcknowledgeLeakButton(coordinator, device))
+                if "open_valve" in button_types:
+                    entities.append(QuandifyOpenValveButton(coordinator, device))
+                if "close_valve" in button_types:
+                    entities.append(QuandifyCloseValveButton(coordinator, device))
+        async_add_entities(entities)
 
-    async_add_entities(entities)
+    entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
 
 
 class QuandifyButton(QuandifyEntity, ButtonEntity):
@@ -55,8 +59,10 @@ class QuandifyAcknowledgeLeakButton(QuandifyButton):
         """Handle the button press."""
         _LOGGER.info("Acknowledging leak for device %s", self.device.id)
         try:
-            await self.coordinator.api.acknowledge_leak(self.device.id)
-        except aiohttp.ClientError as err:
+            await self.coordinator.async_send_command(
+                self.device.id, "acknowledge_leak", {"is_leak": False}
+            )
+        except (aiohttp.ClientError, QuandifyAPIError) as err:
             _LOGGER.error("Failed to acknowledge leak: %s", err)
 
 
@@ -74,10 +80,10 @@ class QuandifyOpenValveButton(QuandifyButton):
         """Handle the button press."""
         _LOGGER.info("Opening valve for device %s", self.device.id)
         try:
-            await self.coordinator.api.open_valve(self.device.id)
-            # After a command, request a refresh to get the new state
-            await self.coordinator.async_request_refresh()
-        except aiohttp.ClientError as err:
+            await self.coordinator.async_send_command(
+                self.device.id, "open_valve", {"valve_state": "open"}
+            )
+        except (aiohttp.ClientError, QuandifyAPIError) as err:
             _LOGGER.error("Failed to open valve: %s", err)
 
 
@@ -95,8 +101,8 @@ class QuandifyCloseValveButton(QuandifyButton):
         """Handle the button press."""
         _LOGGER.info("Closing valve for device %s", self.device.id)
         try:
-            await self.coordinator.api.close_valve(self.device.id)
-            # After a command, request a refresh to get the new state
-            await self.coordinator.async_request_refresh()
-        except aiohttp.ClientError as err:
+            await self.coordinator.async_send_command(
+                self.device.id, "close_valve", {"valve_state": "closed"}
+            )
+        except (aiohttp.ClientError, QuandifyAPIError) as err:
             _LOGGER.error("Failed to close valve: %s", err)
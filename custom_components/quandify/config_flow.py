@@ -1,15 +1,22 @@
 """Config flow for Quandify integration."""
 import logging
+from collections.abc import Mapping
 from typing import Any
 
 import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .api import QuandifyAPI, QuandifyAPIError
-from .const import CONF_EMAIL, CONF_PASSWORD, DOMAIN
+from .const import CONF_ACCOUNT_ID, CONF_EMAIL, CONF_ORGANIZATION_ID, CONF_PASSWORD, DOMAIN
+from .const import CONF_MAX_CONCURRENT_REQUESTS, CONF_PUSH_UPDATES, CONF_REQUEST_TIMEOUT
+from .const import CONF_STALE_TIMEOUT, CONF_UPDATE_INTERVAL
+from .const import DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_MIN_POLL_INTERVAL_SECONDS
+from .const import DEFAULT_PUSH_UPDATES, DEFAULT_REQUEST_TIMEOUT_SECONDS
+from .const import DEFAULT_STALE_TIMEOUT_MINUTES, DEFAULT_UPDATE_INTERVAL_MINUTES
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,6 +25,16 @@ class QuandifyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    _reauth_entry: config_entries.ConfigEntry | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> "QuandifyOptionsFlow":
+        """Return the options flow."""
+        return QuandifyOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> dict[str, Any]:
         """Handle the initial step."""
         errors: dict[str, str] = {}
@@ -36,6 +53,7 @@ class QuandifyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 _LOGGER.exception("An unexpected error occurred during login: %s", err)
                 errors["base"] = "unknown"
             else:
+                api.shutdown()
                 await self.async_set_unique_id(user_input[CONF_EMAIL].lower())
                 self._abort_if_unique_id_configured()
 
@@ -61,3 +79,102 @@ class QuandifyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> dict[str, Any]:
+        """Handle a refresh token that was rejected."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Ask for the password again and log in with it.
+
+        The account and organization IDs are kept from the config entry, so
+        logging in only needs the Quandify auth request.
+        """
+        assert self._reauth_entry is not None
+        entry = self._reauth_entry
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            session = async_get_clientsession(self.hass)
+            api = QuandifyAPI(
+                session,
+                {
+                    CONF_ACCOUNT_ID: entry.data.get(CONF_ACCOUNT_ID),
+                    CONF_ORGANIZATION_ID: entry.data.get(CONF_ORGANIZATION_ID),
+                },
+            )
+
+            try:
+                config = await api.login(entry.data[CONF_EMAIL], user_input[CONF_PASSWORD])
+
+            except ConfigEntryAuthFailed:
+                errors["base"] = "invalid_auth"
+            except (aiohttp.ClientError, QuandifyAPIError):
+                errors["base"] = "cannot_connect"
+            except Exception as err:
+                _LOGGER.exception("An unexpected error occurred during reauthentication: %s", err)
+                errors["base"] = "unknown"
+            else:
+                api.shutdown()
+                return self.async_update_reload_and_abort(
+                    entry, data={**entry.data, **config}
+                )
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=vol.Schema({vol.Required(CONF_PASSWORD): str}),
+            description_placeholders={"email": entry.data[CONF_EMAIL]},
+            errors=errors,
+        )
+
+
+class QuandifyOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options of a Quandify config entry.
+
+    Changes are applied to the running coordinator without a reload.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Manage the polling, request and push options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_UPDATE_INTERVAL,
+                        default=options.get(CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL_MINUTES),
+                    ): vol.All(
+                        vol.Coerce(int),
+                        vol.Range(min=DEFAULT_MIN_POLL_INTERVAL_SECONDS // 60, max=1440),
+                    ),
+                    vol.Required(
+                        CONF_MAX_CONCURRENT_REQUESTS,
+                        default=options.get(
+                            CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                    vol.Required(
+                        CONF_REQUEST_TIMEOUT,
+                        default=options.get(CONF_REQUEST_TIMEOUT, DEFAULT_REQUEST_TIMEOUT_SECONDS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+                    vol.Required(
+                        CONF_STALE_TIMEOUT,
+                        default=options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT_MINUTES),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=10080)),
+                    vol.Required(
+                        CONF_PUSH_UPDATES,
+                        default=options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES),
+                    ): bool,
+                }
+            ),
+        )
@@ -18,8 +18,113 @@ CONF_EMAIL: Final = "email"
 CONF_PASSWORD: Final = "password"
 CONF_ID_TOKEN: Final = "id_token"
 CONF_REFRESH_TOKEN: Final = "refresh_token"
+CONF_FIREBASE_REFRESH_TOKEN: Final = "firebase_refresh_token"
 CONF_ACCOUNT_ID: Final = "account_id"
 CONF_ORGANIZATION_ID: Final = "organization_id"
 
+# Refresh the ID token this many seconds before it expires
+TOKEN_REFRESH_MARGIN_SECONDS: Final = 300
+
+# Rotated tokens are written back to the config entry at most this often
+TOKEN_SAVE_DELAY_SECONDS: Final = 10
+
+# Retries of transient request failures (timeouts, connection errors, 429 and 5xx)
+REQUEST_MAX_RETRIES: Final = 3
+RETRY_BACKOFF_BASE_SECONDS: Final = 1.0
+RETRY_BACKOFF_MAX_SECONDS: Final = 30.0
+
+# A host is skipped after this many consecutive transient failures, and probed
+# again once the reset timeout has passed.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD: Final = 5
+CIRCUIT_BREAKER_RESET_SECONDS: Final = 60.0
+
+# Client-side rate limit for the Quandify API: a token bucket refilled at this
+# rate and holding at most the burst. Requests waiting for a token are served
+# by priority: commands, then polling, then background work.
+REQUEST_RATE_PER_SECOND: Final = 10.0
+REQUEST_BURST: Final = 20
+
+# Flight recorder of recent coordinator cycles, included in diagnostics. Each
+# cycle keeps at most this many requests, token refreshes and errors.
+FLIGHT_RECORDER_CYCLES: Final = 20
+FLIGHT_RECORDER_MAX_ENTRIES: Final = 50
+
+# After a command, poll the device after each of these delays (in seconds)
+# until it reports the expected state, then give up on the optimistic state.
+COMMAND_CONFIRM_DELAYS: Final = (2, 3, 5, 10, 20)
+
+# Storage of the last known devices and state, used to start up without the cloud
+STORAGE_VERSION: Final = 1
+STORAGE_SAVE_DELAY_SECONDS: Final = 60
+
+# Config entries of the same organization share a hub, stored in
+# hass.data[DOMAIN][DATA_HUBS] by organization ID, which polls once for all of
+# them. A device payload the hub fetched this recently is reused.
+DATA_HUBS: Final = "hubs"
+HUB_CACHE_SECONDS: Final = 30
+
+# Optional push updates from the cloud's event stream. While the stream is
+# connected, polling only reconciles at a slow interval. A stream that carries
+# nothing, not even a keepalive, for the idle timeout is reconnected.
+CONF_PUSH_UPDATES: Final = "push_updates"
+DEFAULT_PUSH_UPDATES: Final = False
+PUSH_RECONCILE_INTERVAL_MINUTES: Final = 30
+PUSH_IDLE_TIMEOUT_SECONDS: Final = 90
+PUSH_RECONNECT_MIN_SECONDS: Final = 1.0
+PUSH_RECONNECT_MAX_SECONDS: Final = 300.0
+
+# Import of historical consumption into long-term statistics
+HISTORY_BACKFILL_DAYS: Final = 90
+HISTORY_CHUNK_HOURS: Final = 24
+HISTORY_IMPORT_INTERVAL_HOURS: Final = 1
+# Hours the cloud may take to aggregate readings, not imported before then
+HISTORY_AGGREGATION_LAG_HOURS: Final = 2
+# Hours to wait before trying again after the cloud rejected a history request
+HISTORY_REJECTED_RETRY_HOURS: Final = 24
+
 # Data Update Coordinator
 UPDATE_INTERVAL_MINUTES: Final = 10
+DEFAULT_MAX_CONCURRENT_REQUESTS: Final = 4
+DEFAULT_REQUEST_TIMEOUT_SECONDS: Final = 10
+DEFAULT_BULK_REFRESH: Final = True
+
+# Adaptive polling: active devices are polled at the minimum interval, idle
+# devices back off by POLL_BACKOFF_FACTOR per poll up to the maximum interval.
+DEFAULT_MIN_POLL_INTERVAL_SECONDS: Final = 60
+DEFAULT_MAX_POLL_INTERVAL_SECONDS: Final = UPDATE_INTERVAL_MINUTES * 60
+POLL_BACKOFF_FACTOR: Final = 2.0
+
+# A device that fails to update keeps its last good state for this long
+DEFAULT_STALE_TIMEOUT_MINUTES: Final = 60
+
+# Options, applied to the coordinator without reloading the entry. The update
+# interval is the longest an idle device goes between polls, in minutes.
+CONF_UPDATE_INTERVAL: Final = "update_interval"
+CONF_MAX_CONCURRENT_REQUESTS: Final = "max_concurrent_requests"
+CONF_REQUEST_TIMEOUT: Final = "request_timeout"
+CONF_STALE_TIMEOUT: Final = "stale_timeout"
+DEFAULT_UPDATE_INTERVAL_MINUTES: Final = DEFAULT_MAX_POLL_INTERVAL_SECONDS // 60
+
+# Derived flow rates: the window the consumption rate is averaged over, the
+# number of volume samples kept per device (enough to cover the window at the
+# minimum poll interval, plus the one at its start), and the largest gap between
+# two samples that is still used for a rate (a longer gap, e.g. after downtime,
+# starts over).
+CONSUMPTION_RATE_WINDOW_MINUTES: Final = 60
+FLOW_SAMPLE_COUNT: Final = (
+    CONSUMPTION_RATE_WINDOW_MINUTES * 60 // DEFAULT_MIN_POLL_INTERVAL_SECONDS + 1
+)
+FLOW_MAX_SAMPLE_GAP_SECONDS: Final = 2 * DEFAULT_MAX_POLL_INTERVAL_SECONDS
+
+# The device list is checked for added and removed devices this often. A list
+# fetched by a bulk refresh counts as a check. A device is only removed once it
+# is missing from this many complete lists in a row, and an empty list is ignored.
+DISCOVERY_INTERVAL_MINUTES: Final = 30
+DEVICE_REMOVAL_LISTINGS: Final = 3
+
+# Number of devices requested per page of the device list
+DEVICE_PAGE_SIZE: Final = 100
+
+# Diagnostics include the raw payloads of this many devices, taken from the hub
+# cache where possible, rather than one request per device of the organization
+DIAGNOSTICS_RAW_PAYLOAD_DEVICES: Final = 5
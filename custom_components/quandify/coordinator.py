@@ -1,41 +1,838 @@
 """DataUpdateCoordinator for the Quandify integration."""
 import asyncio
 import logging
-from datetime import timedelta
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta
 from typing import Any
 
-from homeassistant.core import HomeAssistant
+import aiohttp
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from .api import QuandifyAPI
-from .const import DOMAIN, UPDATE_INTERVAL_MINUTES
-from .models import QuandifyDevice
+from .api import PRIORITY_BACKGROUND, QuandifyAPIError, QuandifyRetryLaterError, request_deadline
+from .const import (
+    COMMAND_CONFIRM_DELAYS,
+    DEFAULT_BULK_REFRESH,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_POLL_INTERVAL_SECONDS,
+    DEFAULT_MIN_POLL_INTERVAL_SECONDS,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_REQUEST_TIMEOUT_SECONDS,
+    DEFAULT_STALE_TIMEOUT_MINUTES,
+    DEVICE_REMOVAL_LISTINGS,
+    DISCOVERY_INTERVAL_MINUTES,
+    DOMAIN,
+    POLL_BACKOFF_FACTOR,
+    PUSH_RECONCILE_INTERVAL_MINUTES,
+    UPDATE_INTERVAL_MINUTES,
+)
+from .flight_recorder import QuandifyFlightRecorder, record_error
+from .flow import QuandifyFlowTracker
+from .hub import QuandifyHub
+from .models import QuandifyDevice, QuandifyDeviceState
+from .storage import QuandifySnapshotStore
 
 _LOGGER = logging.getLogger(__name__)
 
-class QuandifyDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+# Refresh timers fire on whole seconds, so allow a device to be polled slightly early
+_DUE_TOLERANCE_SECONDS = 1.0
+
+class QuandifyPollScheduler:
+    """Track a poll interval per device, driven by its recent activity.
+
+    A device that reports a volume change or an active leak is polled at the
+    minimum interval. Each idle poll stretches its interval by the backoff
+    factor until the maximum interval is reached.
+    """
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float,
+        max_interval: float,
+        backoff_factor: float = POLL_BACKOFF_FACTOR,
+    ):
+        """Initialize the scheduler."""
+        self.min_interval = min_interval
+        self.backoff_factor = backoff_factor
+        self._requested_base_interval = base_interval
+        self._intervals: dict[str, float] = {}
+        self._due: dict[str, float] = {}
+        self._volumes: dict[str, float | None] = {}
+        self._set_bounds(max_interval)
+
+    def _set_bounds(self, max_interval: float) -> None:
+        """Set the maximum interval and clamp the base interval to the bounds."""
+        self.max_interval = max(self.min_interval, max_interval)
+        self.base_interval = min(
+            max(self._requested_base_interval, self.min_interval), self.max_interval
+        )
+
+    def interval(self, device_id: str) -> float:
+        """Return the current poll interval for a device, in seconds."""
+        return self._intervals.get(device_id, self.base_interval)
+
+    def is_due(self, device_id: str, now: float) -> bool:
+        """Return True if the device should be polled at ``now``."""
+        return self._due.get(device_id, now) <= now + _DUE_TOLERANCE_SECONDS
+
+    def observe(self, device_id: str, state: QuandifyDeviceState, now: float) -> None:
+        """Update a device's interval from a freshly polled state."""
+        volume = state.total_volume
+        previous_volume = self._volumes.get(device_id)
+        self._volumes[device_id] = volume
+
+        if state.is_leak or (
+            previous_volume is not None and volume != previous_volume
+        ):
+            interval = self.min_interval
+        elif device_id in self._intervals:
+            interval = min(self._intervals[device_id] * self.backoff_factor, self.max_interval)
+        else:
+            interval = self.base_interval
+
+        self._intervals[device_id] = interval
+        self._due[device_id] = now + interval
+
+    def defer(self, device_id: str, now: float, retry_after: float = 0.0) -> None:
+        """Retry a device that failed to update after its current interval.
+
+        If the cloud asked to wait longer, the device is retried after that delay.
+        """
+        self._due[device_id] = now + max(self.interval(device_id), retry_after)
+
+    def set_max_interval(self, max_interval: float, now: float) -> None:
+        """Change the maximum interval, bringing forward devices now polled too late."""
+        self._set_bounds(max_interval)
+        for device_id, interval in self._intervals.items():
+            self._intervals[device_id] = min(interval, self.max_interval)
+        for device_id, due in self._due.items():
+            self._due[device_id] = min(due, now + self.max_interval)
+
+    def forget(self, device_id: str) -> None:
+        """Stop scheduling a removed device."""
+        self._intervals.pop(device_id, None)
+        self._due.pop(device_id, None)
+        self._volumes.pop(device_id, None)
+
+    def next_refresh_in(self, now: float) -> float:
+        """Return the number of seconds until the next device is due."""
+        if not self._due:
+            return self.base_interval
+        delay = min(self._due.values()) - now
+        return min(max(delay, self.min_interval), self.max_interval)
+
+
+class QuandifyDataUpdateCoordinator(DataUpdateCoordinator[dict[str, QuandifyDeviceState]]):
     """Class to manage fetching data from the API."""
 
-    def __init__(self, hass: HomeAssistant, api: QuandifyAPI, devices: list[QuandifyDevice]):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub: QuandifyHub,
+        devices: list[QuandifyDevice],
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT_SECONDS,
+        bulk_refresh: bool = DEFAULT_BULK_REFRESH,
+        min_poll_interval: float = DEFAULT_MIN_POLL_INTERVAL_SECONDS,
+        max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL_SECONDS,
+        stale_timeout: timedelta = timedelta(minutes=DEFAULT_STALE_TIMEOUT_MINUTES),
+        push_updates: bool = DEFAULT_PUSH_UPDATES,
+        store: QuandifySnapshotStore | None = None,
+    ):
         """Initialize."""
-        self.api = api
+        self.hub = hub
+        self.api = hub.api
         self.devices = devices
+        self.store = store
+        self.request_timeout = request_timeout
+        self.stale_timeout = stale_timeout
+        self.bulk_refresh = bulk_refresh
+        self.scheduler = QuandifyPollScheduler(
+            UPDATE_INTERVAL_MINUTES * 60, min_poll_interval, max_poll_interval
+        )
+        # A gap of more than two idle polls between volume samples restarts the rates
+        self.flow = QuandifyFlowTracker(max_gap=2 * self.scheduler.max_interval)
+        self.recorder = QuandifyFlightRecorder()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_requests))
+        # Devices whose state or availability changed in the last refresh;
+        # entities of other devices skip their update entirely.
+        self.changed_device_ids: set[str] = set()
+        self.device_last_success: dict[str, datetime] = {}
+        self.device_errors: dict[str, str] = {}
+        self._available_device_ids: set[str] = set()
+        # Optimistic attribute values per device, shown until the device reports them
+        self._pending_states: dict[str, dict[str, Any]] = {}
+        self._command_tasks: dict[tuple[str, str], asyncio.Task[None]] = {}
+        self._device_refreshes: dict[str, asyncio.Task[QuandifyDeviceState]] = {}
+        # Whether the entry enables push updates; the hub runs the organization's
+        # event stream for the polling coordinator if it does
+        self.push_updates = push_updates
+        # Set while the push listener's event stream is connected
+        self.push_connected = False
+        # Cleared while another coordinator of the organization polls for this one
+        # and provides the device entities
+        self.polling = True
+        self._device_listeners: list[Callable[[list[QuandifyDevice]], None]] = []
+        self._last_discovery: float | None = None
+        # Number of device lists in a row each known device was missing from
+        self._missing_listings: dict[str, int] = {}
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
             update_interval=timedelta(minutes=UPDATE_INTERVAL_MINUTES),
+            always_update=False,
         )
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data via library by polling."""
+    def restore(
+        self,
+        data: dict[str, QuandifyDeviceState],
+        samples: dict[str, list[list[float]]] | None = None,
+        last_success: dict[str, datetime] | None = None,
+    ) -> None:
+        """Use previously stored state until the first refresh completes.
+
+        With the stored success times, a device that fails after a restart
+        keeps its state for the rest of its stale window.
+        """
+        self.data = data
+        self.flow.restore(samples or {})
+        self.device_last_success.update(last_success or {})
+        self._available_device_ids = set(data)
+
+    def device_age(self, device_id: str) -> timedelta | None:
+        """Return how long ago the device last updated successfully."""
+        if (last_success := self.device_last_success.get(device_id)) is None:
+            return None
+        return dt_util.utcnow() - last_success
+
+    def is_device_stale(self, device_id: str) -> bool:
+        """Return True if the device's last update failed and its state is outdated."""
+        return device_id in self.device_errors
+
+    def _is_fresh(self, device_id: str) -> bool:
+        """Return True if the device's state is recent enough to use."""
+        if not self.is_device_stale(device_id):
+            return True
+        age = self.device_age(device_id)
+        return age is not None and age <= self.stale_timeout
+
+    def is_device_available(self, device_id: str) -> bool:
+        """Return True if there is state for the device that is recent enough to use."""
+        return device_id in self._available_device_ids
+
+    @callback
+    def async_add_device_listener(
+        self, listener: Callable[[list[QuandifyDevice]], None]
+    ) -> CALLBACK_TYPE:
+        """Call ``listener`` with the devices to create entities for.
+
+        Device entities have the same unique IDs in every config entry of the
+        organization, so only the polling coordinator provides them: it calls
+        the listener with its devices right away, or once it takes over
+        polling, and with the devices discovered later.
+
+        Return a function that removes the listener.
+        """
+        self._device_listeners.append(listener)
+        if self.polling:
+            listener(self.devices)
+        return lambda: self._device_listeners.remove(listener)
+
+    async def async_discover_devices(self) -> None:
+        """Re-list the devices and take on added and removed ones.
+
+        Nothing is done if the device list was checked within the discovery
+        interval. Unchanged devices and their entities are left alone, and
+        new devices are only fetched individually if the list lacks their state.
+        """
+        now = time.monotonic()
+        if (
+            self._last_discovery is not None
+            and now - self._last_discovery
+            < DISCOVERY_INTERVAL_MINUTES * 60 - _DUE_TOLERANCE_SECONDS
+        ):
+            return
         try:
-            async with asyncio.timeout(30):
-                data = {}
-                for device in self.devices:
-                    device_info = await self.api.get_device_info(device.id)
-                    data[device.id] = device_info
-                return data
-        except Exception as exception:
-            raise UpdateFailed(
-                f"Error communicating with API: {exception}") from exception
+            async with request_deadline(self.request_timeout):
+                listed = await self.hub.async_list_devices(
+                    cached=True, priority=PRIORITY_BACKGROUND
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, QuandifyAPIError) as err:
+            _LOGGER.debug("Failed to list devices for discovery: %s", err)
+            return
+        await self._async_sync_devices(listed, now)
+
+    async def _async_sync_devices(
+        self,
+        listed: dict[str, tuple[QuandifyDevice, QuandifyDeviceState | None]],
+        listed_at: float,
+    ) -> None:
+        """Diff a complete device list against the known devices and apply the difference.
+
+        An empty list is ignored, and a device is only removed once it has
+        been missing from DEVICE_REMOVAL_LISTINGS lists in a row, so a
+        glitch in the cloud does not retire devices.
+        """
+        self._last_discovery = listed_at
+        if not listed:
+            if self.devices:
+                _LOGGER.debug("Ignoring an empty device list")
+            return
+
+        known = {device.id for device in self.devices}
+        added = [device for device_id, (device, _) in listed.items() if device_id not in known]
+        removed: list[QuandifyDevice] = []
+        for device in self.devices:
+            if device.id in listed:
+                self._missing_listings.pop(device.id, None)
+                continue
+            missing = self._missing_listings[device.id] = (
+                self._missing_listings.get(device.id, 0) + 1
+            )
+            if missing >= DEVICE_REMOVAL_LISTINGS:
+                removed.append(device)
+            else:
+                _LOGGER.debug(
+                    "Device %s is missing from the device list (%d of %d)",
+                    device.id, missing, DEVICE_REMOVAL_LISTINGS,
+                )
+        if not added and not removed:
+            return
+
+        removed_ids = {device.id for device in removed}
+        self.devices = [device for device in self.devices if device.id not in removed_ids] + added
+        if removed:
+            self._async_remove_devices(removed)
+        if not added:
+            return
+
+        _LOGGER.info("Discovered %d new Quandify device(s)", len(added))
+        states = {
+            device.id: state
+            for device in added
+            if (state := listed[device.id][1]) is not None
+        }
+        self._async_merge_states(self._record_results(states, {}), states)
+        if missing := [device.id for device in added if device.id not in states]:
+            await self.async_refresh_devices(missing)
+        if self.polling:
+            for listener in list(self._device_listeners):
+                listener(added)
+
+    @callback
+    def _async_remove_devices(self, removed: list[QuandifyDevice]) -> None:
+        """Forget devices that are gone from the account and retire them from the registry."""
+        _LOGGER.info(
+            "Removing %d Quandify device(s) no longer in the account: %s",
+            len(removed),
+            ", ".join(device.name for device in removed),
+        )
+        removed_ids = {device.id for device in removed}
+        for device_id in removed_ids:
+            self.scheduler.forget(device_id)
+            self.flow.forget(device_id)
+            self.device_last_success.pop(device_id, None)
+            self.device_errors.pop(device_id, None)
+            self._pending_states.pop(device_id, None)
+            self._missing_listings.pop(device_id, None)
+            self._available_device_ids.discard(device_id)
+        self.data = {
+            device_id: state
+            for device_id, state in (self.data or {}).items()
+            if device_id not in removed_ids
+        }
+        if self.store is not None:
+            self.store.async_schedule_save(
+                self.devices, self.data, self.flow, self.device_last_success
+            )
+
+        if self.config_entry is None:
+            return
+        registry = dr.async_get(self.hass)
+        for device_id in removed_ids:
+            if device_entry := registry.async_get_device(identifiers={(DOMAIN, device_id)}):
+                registry.async_update_device(
+                    device_entry.id, remove_config_entry_id=self.config_entry.entry_id
+                )
+
+    @callback
+    def async_set_polling(self, polling: bool) -> None:
+        """Start or stop polling on this coordinator's own timer.
+
+        Of the coordinators sharing a hub only one polls, and the hub hands
+        its results to the others through async_apply_results, so a
+        coordinator taking over has current states for the device entities
+        it creates.
+        """
+        if polling == self.polling:
+            return
+        self.polling = polling
+        self.update_interval = self._next_update_interval(time.monotonic())
+        if not polling:
+            self._async_unsub_refresh()
+            return
+        if self._listeners:
+            self._schedule_refresh()
+        for listener in list(self._device_listeners):
+            listener(self.devices)
+
+    @callback
+    def async_apply_results(
+        self, fetched: dict[str, QuandifyDeviceState], failed: dict[str, Exception]
+    ) -> None:
+        """Apply device states and errors that another coordinator of the organization fetched."""
+        known = {device.id for device in self.devices}
+        fetched = {device_id: state for device_id, state in fetched.items() if device_id in known}
+        failed = {device_id: error for device_id, error in failed.items() if device_id in known}
+        if fetched or failed:
+            self._async_merge_states(self._record_results(fetched, failed), [*fetched, *failed])
+
+    @callback
+    def async_set_push_connected(self, connected: bool) -> None:
+        """Switch between slow reconciliation polling and regular polling.
+
+        The new interval takes effect after the next refresh.
+        """
+        self.push_connected = connected
+
+    @callback
+    def async_update_options(
+        self,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT_SECONDS,
+        max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL_SECONDS,
+        stale_timeout: timedelta = timedelta(minutes=DEFAULT_STALE_TIMEOUT_MINUTES),
+        push_updates: bool = DEFAULT_PUSH_UPDATES,
+    ) -> None:
+        """Apply changed options without reloading the entry.
+
+        Requests already running keep their old limits. The next refresh is
+        rescheduled for the new interval, entities of devices whose
+        availability changes with the new stale timeout are updated now, and
+        the hub starts or stops the event stream.
+        """
+        now = time.monotonic()
+        self.request_timeout = request_timeout
+        self.stale_timeout = stale_timeout
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_requests))
+        self.scheduler.set_max_interval(max_poll_interval, now)
+        self.flow.max_gap = 2 * self.scheduler.max_interval
+
+        self.update_interval = self._next_update_interval(now)
+        if self._listeners:
+            self._schedule_refresh()
+
+        available = {device_id for device_id in self.data or {} if self._is_fresh(device_id)}
+        if changed := available ^ self._available_device_ids:
+            self._available_device_ids = available
+            self.changed_device_ids = changed
+            self.async_update_listeners()
+
+        if push_updates != self.push_updates:
+            self.push_updates = push_updates
+            self.hub.async_update_push()
+
+    @callback
+    def async_apply_push(self, payload: dict[str, Any]) -> None:
+        """Merge a partial device payload from the event stream into the data.
+
+        Updates for unknown devices, or devices without state yet, are
+        ignored; the next poll picks those up. Like polled states, the update
+        is handed to the other coordinators of the organization.
+        """
+        device_id = payload.get("id")
+        if (previous := (self.data or {}).get(device_id)) is None:
+            return
+
+        state = previous.merge_api(payload)
+        utcnow = dt_util.utcnow()
+        self.device_last_success[device_id] = utcnow
+        self.device_errors.pop(device_id, None)
+        if state.total_volume != previous.total_volume:
+            self.flow.add(device_id, utcnow.timestamp(), state.total_volume)
+            state = state.replace(
+                flow_rate=self.flow.flow_rate(device_id),
+                consumption_rate=self.flow.consumption_rate(device_id),
+            )
+        self.hub.async_publish(self, {device_id: state}, {})
+        self._async_merge_states({device_id: self._apply_pending(device_id, state)}, [device_id])
+
+    async def async_shutdown(self) -> None:
+        """Cancel pending command confirmations and shut down the coordinator."""
+        for task in self._command_tasks.values():
+            task.cancel()
+        self._command_tasks.clear()
+        await super().async_shutdown()
+
+    async def async_send_command(
+        self, device_id: str, command: str, expected: dict[str, Any]
+    ) -> None:
+        """Send a command to a device and show its expected outcome right away.
+
+        ``command`` is the name of a QuandifyAPI method such as "open_valve", and
+        ``expected`` the device state attributes the command should result in.
+        Only those are shown optimistically, over any fresh data, until the
+        device reports them or the confirmation schedule runs out; the device
+        alone is polled on a short backoff schedule meanwhile. A repeated
+        command is ignored while the same one is being sent or confirmed.
+        """
+        key = (device_id, command)
+        if (task := self._command_tasks.get(key)) is not None and not task.done():
+            _LOGGER.debug("Ignoring repeated %s for device %s", command, device_id)
+            return
+
+        # Registered before sending, so a second press while the first is in flight is ignored
+        send = self.hass.async_create_task(getattr(self.api, command)(device_id))
+        self._command_tasks[key] = send
+        try:
+            await send
+        finally:
+            self._forget_command_task(key, send)
+
+        self._pending_states.setdefault(device_id, {}).update(expected)
+        if (state := (self.data or {}).get(device_id)) is not None:
+            self._async_merge_states({device_id: state.replace(**expected)})
+
+        task = self.hass.async_create_background_task(
+            self._async_confirm_command(device_id, expected),
+            f"{DOMAIN} confirm {command} {device_id}",
+        )
+        self._command_tasks[key] = task
+        task.add_done_callback(lambda done: self._forget_command_task(key, done))
+
+    def _forget_command_task(self, key: tuple[str, str], task: "asyncio.Task[Any]") -> None:
+        """Forget a command's task, unless a newer one has replaced it."""
+        if self._command_tasks.get(key) is task:
+            del self._command_tasks[key]
+
+    async def _async_confirm_command(self, device_id: str, expected: dict[str, Any]) -> None:
+        """Poll a device until it reports the expected state, or give up."""
+        for delay in COMMAND_CONFIRM_DELAYS:
+            await asyncio.sleep(delay)
+            if not self._is_pending(device_id, expected):
+                # Confirmed by a regular refresh or push in the meantime
+                return
+            if failed := await self.async_refresh_devices([device_id]):
+                _LOGGER.debug(
+                    "Failed to poll device %s after command: %s", device_id, failed[device_id]
+                )
+                continue
+            if not self._is_pending(device_id, expected):
+                _LOGGER.debug("Device %s confirmed %s", device_id, expected)
+                return
+
+        _LOGGER.warning("Device %s did not confirm %s in time", device_id, expected)
+        if self._is_pending(device_id, expected):
+            # Stop showing the optimistic values and fetch what the device reports
+            pending = self._pending_states[device_id]
+            for attribute, value in expected.items():
+                if pending.get(attribute) == value:
+                    del pending[attribute]
+            if not pending:
+                del self._pending_states[device_id]
+            await self.async_refresh_devices([device_id])
+
+    def _is_pending(self, device_id: str, expected: dict[str, Any]) -> bool:
+        """Return True if any of the expected values is still shown optimistically."""
+        pending = self._pending_states.get(device_id, {})
+        return any(
+            attribute in pending and pending[attribute] == value
+            for attribute, value in expected.items()
+        )
+
+    def _apply_pending(self, device_id: str, state: QuandifyDeviceState) -> QuandifyDeviceState:
+        """Overlay the unconfirmed values of commands on a fresh device state.
+
+        Values the state confirms are no longer pending; every other field
+        of the state, such as a new leak, is shown as reported.
+        """
+        if (pending := self._pending_states.get(device_id)) is None:
+            return state
+        for attribute, value in list(pending.items()):
+            if getattr(state, attribute) == value:
+                del pending[attribute]
+        if not pending:
+            del self._pending_states[device_id]
+            return state
+        return state.replace(**pending)
+
+    async def async_refresh_devices(self, device_ids: Iterable[str]) -> dict[str, Exception]:
+        """Refresh only the given devices and merge their state into the data.
+
+        Only entities of devices whose state or availability changed are
+        updated. A device that is already being refreshed is not requested
+        again; the caller shares the in-flight result. Return the errors of
+        the devices that failed to update.
+        """
+        with self.recorder.cycle("refresh_devices"):
+            return await self._async_refresh_devices(device_ids)
+
+    async def _async_refresh_devices(self, device_ids: Iterable[str]) -> dict[str, Exception]:
+        """Refresh the given devices, see async_refresh_devices."""
+        wanted = set(device_ids)
+        tasks: dict[str, asyncio.Task[QuandifyDeviceState]] = {}
+        for device in self.devices:
+            if device.id not in wanted:
+                continue
+            if (task := self._device_refreshes.get(device.id)) is None:
+                task = self.hass.async_create_task(self._async_fetch_device(device))
+                self._device_refreshes[device.id] = task
+                task.add_done_callback(
+                    lambda _, device_id=device.id: self._device_refreshes.pop(device_id, None)
+                )
+            tasks[device.id] = task
+
+        results = await asyncio.gather(
+            *(asyncio.shield(task) for task in tasks.values()), return_exceptions=True
+        )
+        fetched: dict[str, QuandifyDeviceState] = {}
+        failed: dict[str, Exception] = {}
+        for device_id, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                failed[device_id] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                fetched[device_id] = result
+
+        self.hub.async_publish(self, fetched, failed)
+        self._async_merge_states(self._record_results(fetched, failed), tasks)
+        return failed
+
+    def _record_results(
+        self, fetched: dict[str, QuandifyDeviceState], failed: dict[str, Exception]
+    ) -> dict[str, QuandifyDeviceState]:
+        """Update poll schedules, success times and errors from a round of fetches.
+
+        Return the fetched states with their derived flow rates, and the
+        values of unconfirmed commands overlaid.
+        """
+        now = time.monotonic()
+        utcnow = dt_util.utcnow()
+        timestamp = utcnow.timestamp()
+        states: dict[str, QuandifyDeviceState] = {}
+        for device_id, state in fetched.items():
+            self.scheduler.observe(device_id, state, now)
+            self.device_last_success[device_id] = utcnow
+            self.device_errors.pop(device_id, None)
+            self.flow.add(device_id, timestamp, state.total_volume)
+            state = state.replace(
+                flow_rate=self.flow.flow_rate(device_id),
+                consumption_rate=self.flow.consumption_rate(device_id),
+            )
+            states[device_id] = self._apply_pending(device_id, state)
+        for device_id, error in failed.items():
+            self.scheduler.defer(
+                device_id,
+                now,
+                error.retry_after if isinstance(error, QuandifyRetryLaterError) else 0.0,
+            )
+            self.device_errors[device_id] = repr(error)
+            record_error(device_id, error)
+        return states
+
+    def _async_merge_states(
+        self, states: dict[str, QuandifyDeviceState], device_ids: Iterable[str] = ()
+    ) -> None:
+        """Merge device states into the data, notifying only if something changed.
+
+        The availability of the devices in ``device_ids`` is re-evaluated as well.
+        """
+        previous = self.data or {}
+        changed = {
+            device_id for device_id, state in states.items() if previous.get(device_id) != state
+        }
+        for device_id in device_ids:
+            available = (device_id in states or device_id in previous) and self._is_fresh(device_id)
+            if available != (device_id in self._available_device_ids):
+                changed.add(device_id)
+                if available:
+                    self._available_device_ids.add(device_id)
+                else:
+                    self._available_device_ids.discard(device_id)
+
+        self.changed_device_ids = changed
+        if not changed:
+            return
+        self.data = {**previous, **states}
+        if self.store is not None:
+            self.store.async_schedule_save(
+                self.devices, self.data, self.flow, self.device_last_success
+            )
+        self.async_update_listeners()
+
+    async def async_get_device_payload(
+        self, device_id: str, cached: bool = False
+    ) -> dict[str, Any]:
+        """Fetch a device's raw payload, bounded by the concurrency limit and its own timeout.
+
+        With ``cached`` set, a payload the hub fetched recently for another
+        config entry is used instead.
+        """
+        async with self._semaphore:
+            async with request_deadline(self.request_timeout):
+                return await self.hub.async_get_device_info(device_id, cached)
+
+    async def _async_fetch_device(
+        self, device: QuandifyDevice, cached: bool = False
+    ) -> QuandifyDeviceState:
+        """Fetch a single device's state, see async_get_device_payload."""
+        return QuandifyDeviceState.from_api(
+            await self.async_get_device_payload(device.id, cached)
+        )
+
+    async def _async_fetch_devices(
+        self, devices: list[QuandifyDevice], cached: bool = False
+    ) -> tuple[dict[str, QuandifyDeviceState], dict[str, Exception]]:
+        """Fetch the given devices concurrently, one request per device.
+
+        Return the states of the devices that updated and the errors of those that failed.
+        """
+        results = await asyncio.gather(
+            *(self._async_fetch_device(device, cached) for device in devices),
+            return_exceptions=True,
+        )
+        fetched: dict[str, QuandifyDeviceState] = {}
+        failed: dict[str, Exception] = {}
+        for device, result in zip(devices, results):
+            if isinstance(result, Exception):
+                failed[device.id] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                fetched[device.id] = result
+        return fetched, failed
+
+    async def _async_fetch_bulk(
+        self, due: list[QuandifyDevice]
+    ) -> tuple[dict[str, QuandifyDeviceState], dict[str, Exception]]:
+        """Fill device data from the device list, read page by page.
+
+        Due devices whose list entry lacks any of the fields the platforms
+        read are fetched individually. If the list call fails, all due devices
+        are reported as failed, as are due devices missing from the list. The
+        list is also diffed against the known devices once the refresh is
+        done, which retires devices that stay missing from it.
+        """
+        listed_at = time.monotonic()
+        try:
+            async with request_deadline(self.request_timeout):
+                listed = await self.hub.async_list_devices(cached=True)
+        except Exception as err:  # pylint: disable=broad-except
+            return {}, {device.id: err for device in due}
+
+        self.hass.async_create_task(
+            self._async_sync_devices(listed, listed_at),
+            f"{DOMAIN} device discovery",
+        )
+
+        due_ids = {device.id for device in due}
+        data: dict[str, QuandifyDeviceState] = {}
+        failed: dict[str, Exception] = {}
+        fallback: list[QuandifyDevice] = []
+        for device in self.devices:
+            if (listing := listed.get(device.id)) is None:
+                if device.id in due_ids:
+                    failed[device.id] = QuandifyAPIError("Device is missing from the device list")
+            elif (state := listing[1]) is not None:
+                data[device.id] = state
+            elif device.id in due_ids:
+                fallback.append(device)
+
+        if fallback:
+            _LOGGER.debug(
+                "Device list is missing state for %d device(s), fetching individually",
+                len(fallback),
+            )
+            fetched, fallback_failed = await self._async_fetch_devices(fallback, cached=True)
+            data.update(fetched)
+            failed.update(fallback_failed)
+
+        return data, failed
+
+    def _next_update_interval(self, now: float) -> timedelta | None:
+        """Return the time until the next device is due, or the push reconcile interval.
+
+        A coordinator that receives its results from another one of the
+        organization does not poll on its own.
+        """
+        if not self.polling:
+            return None
+        interval = self.scheduler.next_refresh_in(now)
+        if self.push_connected:
+            interval = max(interval, PUSH_RECONCILE_INTERVAL_MINUTES * 60)
+        return timedelta(seconds=interval)
+
+    async def _async_update_data(self) -> dict[str, QuandifyDeviceState]:
+        """Update data via library by polling the devices that are due.
+
+        A device that fails keeps its last good state until the stale timeout
+        passes; the update only fails if no device has usable state left.
+        The results are handed to the other config entries of the same
+        organization through the hub, and payloads the hub fetched recently
+        are reused rather than requested again. Each update is kept in the
+        flight recorder.
+        """
+        with self.recorder.cycle("update"):
+            return await self._async_poll_due()
+
+    async def _async_poll_due(self) -> dict[str, QuandifyDeviceState]:
+        """Poll the devices that are due, see _async_update_data."""
+        start = now = time.monotonic()
+        due = [device for device in self.devices if self.scheduler.is_due(device.id, now)]
+
+        if self.bulk_refresh:
+            fetched, failed = await self._async_fetch_bulk(due)
+        else:
+            fetched, failed = await self._async_fetch_devices(due, cached=True)
+
+        now = time.monotonic()
+        self.api.metrics.record_cycle(now - start, not failed)
+
+        for error in failed.values():
+            if isinstance(error, ConfigEntryAuthFailed):
+                raise error
+
+        self.hub.async_publish(self, fetched, failed)
+        previous = self.data or {}
+        fetched = self._record_results(fetched, failed)
+        self.update_interval = self._next_update_interval(now)
+
+        if failed:
+            _LOGGER.warning(
+                "Failed to update %d of %d device(s): %s",
+                len(failed),
+                len(due),
+                next(iter(failed.values())),
+            )
+
+        data = {**previous, **fetched}
+        available = {device_id for device_id in data if self._is_fresh(device_id)}
+        was_available = self._available_device_ids
+        self._available_device_ids = available
+        if failed and not available:
+            error = next(iter(failed.values()))
+            raise UpdateFailed(f"Error communicating with API: {error!r}") from error
+
+        self.changed_device_ids = {
+            device_id
+            for device_id, state in fetched.items()
+            if previous.get(device_id) != state
+        } | (available ^ was_available)
+        # A changed state makes the data unequal, which notifies the listeners,
+        # but a device going stale or coming back leaves the data the same
+        if self.changed_device_ids and data == previous:
+            self.async_update_listeners()
+
+        # Success times move on every fetch, even if the state stays the same
+        if self.store is not None and (self.changed_device_ids or fetched):
+            self.store.async_schedule_save(
+                self.devices, data, self.flow, self.device_last_success
+            )
+        return data
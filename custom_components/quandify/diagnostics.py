@@ -1,34 +1,90 @@
 """Diagnostics support for Quandify integration."""
 from __future__ import annotations
+import asyncio
 from typing import Any
 
+from homeassistant.components.diagnostics import async_redact_data
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import CONF_ID_TOKEN, CONF_REFRESH_TOKEN, DOMAIN
+from .const import (
+    CONF_ACCOUNT_ID,
+    CONF_EMAIL,
+    CONF_FIREBASE_REFRESH_TOKEN,
+    CONF_ID_TOKEN,
+    CONF_ORGANIZATION_ID,
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    DIAGNOSTICS_RAW_PAYLOAD_DEVICES,
+    DOMAIN,
+)
 from .coordinator import QuandifyDataUpdateCoordinator
 
+# Credentials, account identifiers and what identifies a device or its owner,
+# anywhere in the dump, raw payloads included
+TO_REDACT = {
+    CONF_ACCOUNT_ID,
+    CONF_EMAIL,
+    CONF_FIREBASE_REFRESH_TOKEN,
+    CONF_ID_TOKEN,
+    CONF_ORGANIZATION_ID,
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    "title",
+    "serial",
+    "name",
+}
+
 async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    # Redact sensitive information
-    redacted_data = dict(entry.data)
-    if CONF_ID_TOKEN in redacted_data:
-        redacted_data[CONF_ID_TOKEN] = "**REDACTED**"
-    if CONF_REFRESH_TOKEN in redacted_data:
-        redacted_data[CONF_REFRESH_TOKEN] = "**REDACTED**"
+    # The coordinator only keeps parsed state, so fetch full payloads for a few
+    # devices, within the same concurrency limit and timeout as a poll, reusing
+    # what the hub fetched recently
+    sampled = coordinator.devices[:DIAGNOSTICS_RAW_PAYLOAD_DEVICES]
+    raw_payloads = await asyncio.gather(
+        *(coordinator.async_get_device_payload(device.id, cached=True) for device in sampled),
+        return_exceptions=True,
+    )
 
-    return {
+    diagnostics = {
         "entry": {
             "title": entry.title,
-            "data": redacted_data,
+            "data": dict(entry.data),
             "options": dict(entry.options),
         },
         "coordinator": {
             "last_update_success": coordinator.last_update_success,
-            "data": coordinator.data,
+            "update_interval": str(coordinator.update_interval),
+            "push_connected": coordinator.push_connected,
+            "data": {
+                device_id: state.as_dict()
+                for device_id, state in (coordinator.data or {}).items()
+            },
+            "devices": {
+                device.id: {
+                    "available": coordinator.is_device_available(device.id),
+                    "stale": coordinator.is_device_stale(device.id),
+                    "last_success": last_success.isoformat()
+                    if (last_success := coordinator.device_last_success.get(device.id))
+                    else None,
+                    "error": coordinator.device_errors.get(device.id),
+                }
+                for device in coordinator.devices
+            },
+        },
+        "hub": {
+            "entries": len(coordinator.hub.entries),
+            "owner": coordinator.hub.owner is entry,
+        },
+        "metrics": coordinator.api.metrics.as_dict(),
+        "flight_recorder": coordinator.recorder.as_list(),
+        "raw_payloads": {
+            device.id: payload if not isinstance(payload, Exception) else repr(payload)
+            for device, payload in zip(sampled, raw_payloads)
         },
     }
+    return async_redact_data(diagnostics, TO_REDACT)
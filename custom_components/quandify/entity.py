@@ -1,11 +1,19 @@
 """Base entity for the Quandify integration."""
+from collections.abc import Callable
+from operator import attrgetter
 from typing import Any
 
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .models import QuandifyDevice
+from .models import DEVICE_STATE_ATTRIBUTES, QuandifyDevice, QuandifyDeviceState
+
+
+def state_getter(key: str) -> Callable[[QuandifyDeviceState], Any]:
+    """Return a getter for the device state attribute behind a key such as "status.total_volume"."""
+    return attrgetter(DEVICE_STATE_ATTRIBUTES[key])
 
 
 class QuandifyEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
@@ -25,8 +33,31 @@ class QuandifyEntity(CoordinatorEntity[QuandifyDataUpdateCoordinator]):
             "serial_number": self.device.serial,
             "sw_version": self.device.firmware_version,
         }
+        self._written_available: bool | None = None
+
+    @property
+    def available(self) -> bool:
+        """Return True if the coordinator and this entity's device have usable data."""
+        return super().available and self.coordinator.is_device_available(self.device.id)
+
+    def _update_attr(self) -> bool:
+        """Update the entity attributes from the device data.
+
+        Return True if the state changed.
+        """
+        return False
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if this entity's state or availability changed."""
+        changed = self.device.id in self.coordinator.changed_device_ids and self._update_attr()
+        available = self.available
+        if not changed and available == self._written_available:
+            return
+        self._written_available = available
+        super()._handle_coordinator_update()
 
     @property
-    def device_data(self) -> dict[str, Any] | None:
-        """Return the latest data for this entity's device."""
+    def device_state(self) -> QuandifyDeviceState | None:
+        """Return the latest state for this entity's device."""
         return self.coordinator.data.get(self.device.id)
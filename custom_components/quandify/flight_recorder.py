@@ -0,0 +1,154 @@
+"""Flight recorder of recent coordinator cycles for the Quandify integration."""
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from .const import FLIGHT_RECORDER_CYCLES, FLIGHT_RECORDER_MAX_ENTRIES
+
+# The cycle being recorded in the current task; tasks started during a cycle inherit it
+_current_cycle: ContextVar["CycleRecord | None"] = ContextVar(
+    "quandify_current_cycle", default=None
+)
+
+
+def describe_error(err: BaseException) -> str:
+    """Describe an error by its type and HTTP status only, leaving out URLs and messages."""
+    if isinstance(err, aiohttp.ClientResponseError):
+        return f"{type(err).__name__} {err.status}"
+    return type(err).__name__
+
+
+class CycleRecord:
+    """What happened during one coordinator cycle, capped at a fixed number of entries."""
+
+    __slots__ = (
+        "kind",
+        "started",
+        "start",
+        "duration",
+        "requests",
+        "token_refreshes",
+        "errors",
+        "dropped",
+    )
+
+    def __init__(self, kind: str) -> None:
+        """Start recording a cycle."""
+        self.kind = kind
+        self.started = dt_util.utcnow()
+        self.start = time.monotonic()
+        self.duration: float | None = None
+        self.requests: list[tuple[str, int | None, float, float, int, str | None]] = []
+        self.token_refreshes: list[tuple[str, str | None]] = []
+        self.errors: list[str] = []
+        self.dropped = 0
+
+    def _add(self, entries: list[Any], entry: Any) -> None:
+        """Add an entry to a list unless it is full."""
+        if len(entries) < FLIGHT_RECORDER_MAX_ENTRIES:
+            entries.append(entry)
+        else:
+            self.dropped += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the record as a dictionary."""
+        return {
+            "kind": self.kind,
+            "started": self.started.isoformat(),
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "requests": [
+                {
+                    "endpoint": endpoint,
+                    "status": status,
+                    "offset_ms": round(offset * 1000, 1),
+                    "duration_ms": round(duration * 1000, 1),
+                    "size": size,
+                    "error": error,
+                }
+                for endpoint, status, offset, duration, size, error in self.requests
+            ],
+            "token_refreshes": [
+                {"method": method, "error": error} for method, error in self.token_refreshes
+            ],
+            "errors": self.errors,
+            "dropped_entries": self.dropped,
+        }
+
+
+def record_request(
+    endpoint: str,
+    status: int | None,
+    start: float,
+    duration: float,
+    size: int,
+    error: BaseException | None = None,
+) -> None:
+    """Add a request to the cycle being recorded, if any."""
+    if (cycle := _current_cycle.get()) is not None:
+        cycle._add(  # pylint: disable=protected-access
+            cycle.requests,
+            (
+                endpoint,
+                status,
+                start - cycle.start,
+                duration,
+                size,
+                describe_error(error) if error is not None else None,
+            ),
+        )
+
+
+def record_token_refresh(method: str, error: BaseException | None = None) -> None:
+    """Add a token refresh attempt to the cycle being recorded, if any."""
+    if (cycle := _current_cycle.get()) is not None:
+        cycle._add(  # pylint: disable=protected-access
+            cycle.token_refreshes,
+            (method, describe_error(error) if error is not None else None),
+        )
+
+
+def record_error(source: str, error: BaseException) -> None:
+    """Add an error to the cycle being recorded, if any."""
+    if (cycle := _current_cycle.get()) is not None:
+        cycle._add(  # pylint: disable=protected-access
+            cycle.errors, f"{source}: {describe_error(error)}"
+        )
+
+
+class QuandifyFlightRecorder:
+    """Keep the records of the last coordinator cycles in a fixed-size ring buffer.
+
+    Requests, token refreshes and errors are attributed to the cycle running
+    in the current task through a context variable, so the API client does
+    not need to know about cycles. Only endpoint names, HTTP statuses and
+    error types are kept; no URLs, tokens or response bodies.
+    """
+
+    def __init__(self, size: int = FLIGHT_RECORDER_CYCLES) -> None:
+        """Initialize the recorder."""
+        self._records: deque[CycleRecord] = deque(maxlen=size)
+
+    @contextmanager
+    def cycle(self, kind: str) -> Iterator[CycleRecord]:
+        """Record everything that happens in the current task until the block exits."""
+        record = CycleRecord(kind)
+        token = _current_cycle.set(record)
+        try:
+            yield record
+        except Exception as err:
+            record_error("cycle", err)
+            raise
+        finally:
+            _current_cycle.reset(token)
+            record.duration = time.monotonic() - record.start
+            self._records.append(record)
+
+    def as_list(self) -> list[dict[str, Any]]:
+        """Return the recorded cycles, oldest first."""
+        return [record.as_dict() for record in self._records]
@@ -0,0 +1,82 @@
+"""Flow rates derived from successive total volume readings."""
+from collections import deque
+from typing import Any
+
+from .const import (
+    CONSUMPTION_RATE_WINDOW_MINUTES,
+    FLOW_MAX_SAMPLE_GAP_SECONDS,
+    FLOW_SAMPLE_COUNT,
+)
+
+
+class QuandifyFlowTracker:
+    """Keep a bounded buffer of timestamped volume samples per device.
+
+    Adding a sample and reading the rates touch only the ends of a device's
+    buffer, so the cost per device and poll is constant. A volume lower than
+    the previous one (a counter reset) or a gap longer than the maximum
+    sample gap (missed polls, downtime) restarts the device's buffer.
+    """
+
+    def __init__(
+        self,
+        sample_count: int = FLOW_SAMPLE_COUNT,
+        window: float = CONSUMPTION_RATE_WINDOW_MINUTES * 60,
+        max_gap: float = FLOW_MAX_SAMPLE_GAP_SECONDS,
+    ):
+        """Initialize the tracker."""
+        self.sample_count = sample_count
+        self.window = window
+        self.max_gap = max_gap
+        self._samples: dict[str, deque[tuple[float, float]]] = {}
+
+    def add(self, device_id: str, timestamp: float, volume: float | None) -> None:
+        """Add a volume reading, in liters, taken at a POSIX timestamp."""
+        if volume is None:
+            return
+        samples = self._samples.get(device_id)
+        if samples is None:
+            samples = self._samples[device_id] = deque(maxlen=self.sample_count)
+        elif samples:
+            last_timestamp, last_volume = samples[-1]
+            if timestamp <= last_timestamp:
+                return
+            if volume < last_volume or timestamp - last_timestamp > self.max_gap:
+                samples.clear()
+        samples.append((timestamp, volume))
+        # Keep one sample at or before the window start so the window is fully covered
+        while len(samples) > 2 and samples[1][0] <= timestamp - self.window:
+            samples.popleft()
+
+    def flow_rate(self, device_id: str) -> float | None:
+        """Return the flow between the last two samples, in liters per minute."""
+        samples = self._samples.get(device_id)
+        if not samples or len(samples) < 2:
+            return None
+        (start, start_volume), (end, end_volume) = samples[-2], samples[-1]
+        return round((end_volume - start_volume) / (end - start) * 60, 2)
+
+    def consumption_rate(self, device_id: str) -> float | None:
+        """Return the average flow over the buffered window, in liters per hour."""
+        samples = self._samples.get(device_id)
+        if not samples or len(samples) < 2:
+            return None
+        (start, start_volume), (end, end_volume) = samples[0], samples[-1]
+        return round((end_volume - start_volume) / (end - start) * 3600, 1)
+
+    def forget(self, device_id: str) -> None:
+        """Drop the samples of a removed device."""
+        self._samples.pop(device_id, None)
+
+    def restore(self, samples: dict[str, list[list[float]]]) -> None:
+        """Restore samples previously returned by ``as_dict``."""
+        for device_id, device_samples in samples.items():
+            for timestamp, volume in device_samples:
+                self.add(device_id, timestamp, volume)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the samples of all devices in a JSON serializable form."""
+        return {
+            device_id: [list(sample) for sample in samples]
+            for device_id, samples in self._samples.items()
+        }
@@ -0,0 +1,205 @@
+"""Import of historical water consumption into long-term statistics."""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+import aiohttp
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    DOMAIN,
+    HISTORY_AGGREGATION_LAG_HOURS,
+    HISTORY_BACKFILL_DAYS,
+    HISTORY_CHUNK_HOURS,
+    HISTORY_REJECTED_RETRY_HOURS,
+    STORAGE_SAVE_DELAY_SECONDS,
+    STORAGE_VERSION,
+)
+from .coordinator import QuandifyDataUpdateCoordinator
+from .models import QuandifyDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def consumption_statistic_id(device: QuandifyDevice) -> str:
+    """Return the external statistic ID for a device's water consumption."""
+    return f"{DOMAIN}:{slugify(device.id)}_water_consumption"
+
+
+def _checkpoint_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding the import checkpoints of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history")
+
+
+async def async_remove_checkpoints(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored import checkpoints of a config entry."""
+    await _checkpoint_store(hass, entry_id).async_remove()
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    """Parse an ISO 8601 string or UNIX timestamp into an aware datetime."""
+    if isinstance(value, (int, float)):
+        return dt_util.utc_from_timestamp(value)
+    if isinstance(value, str):
+        return dt_util.parse_datetime(value)
+    return None
+
+
+class QuandifyHistoryImporter:
+    """Stream historical total volume into long-term statistics, one chunk at a time.
+
+    A checkpoint per device stores where the import got to, with the total
+    volume and statistic sum of the last imported hour, so each run only
+    fetches the interval since the previous one. Hours within the cloud's
+    aggregation lag are left for a later run, as is the last chunk while it
+    returns no data. The sum adds up the increases of the total volume, so
+    a meter that resets does not make it go backwards.
+
+    If the cloud rejects the history request, imports are suspended for
+    HISTORY_REJECTED_RETRY_HOURS.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: QuandifyDataUpdateCoordinator, entry: ConfigEntry):
+        """Initialize the importer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._entry = entry
+        self._store = _checkpoint_store(hass, entry.entry_id)
+        self._checkpoints: dict[str, dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        # Monotonic time before which imports are skipped after a rejected request
+        self._retry_at: float | None = None
+        self._rejected = False
+
+    async def async_load(self) -> None:
+        """Load the stored checkpoints."""
+        stored = await self._store.async_load() or {}
+        self._checkpoints = {
+            # Older checkpoints only held the end, with the sum equal to the total volume
+            device_id: checkpoint if isinstance(checkpoint, dict) else {"end": checkpoint}
+            for device_id, checkpoint in stored.items()
+        }
+
+    @callback
+    def async_schedule_import(self, _now: datetime | None = None) -> None:
+        """Start an import in the background unless one is already running."""
+        if self._lock.locked():
+            return
+        self._entry.async_create_background_task(
+            self.hass, self.async_import(), f"{DOMAIN} history import"
+        )
+
+    async def async_import(self) -> None:
+        """Import all aggregated hours since the last checkpoint for every device."""
+        if self._retry_at is not None and time.monotonic() < self._retry_at:
+            return
+        self._retry_at = None
+
+        async with self._lock:
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+                hours=HISTORY_AGGREGATION_LAG_HOURS
+            )
+            for device in list(self.coordinator.devices):
+                try:
+                    await self._async_import_device(device, end)
+                except aiohttp.ClientResponseError as err:
+                    if 400 <= err.status < 500 and err.status != 429:
+                        self._async_suspend(err)
+                        return
+                    _LOGGER.warning(
+                        "Failed to import consumption history for %s: %s", device.name, err
+                    )
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOGGER.warning(
+                        "Failed to import consumption history for %s: %s", device.name, err
+                    )
+            self._rejected = False
+
+    @callback
+    def _async_suspend(self, err: aiohttp.ClientResponseError) -> None:
+        """Stop importing for a while after the cloud rejected a history request."""
+        self._retry_at = time.monotonic() + HISTORY_REJECTED_RETRY_HOURS * 3600
+        # Only warn the first time in a row
+        log = _LOGGER.debug if self._rejected else _LOGGER.warning
+        log(
+            "Quandify rejected the consumption history request (%s), retrying in %d hours",
+            err.status,
+            HISTORY_REJECTED_RETRY_HOURS,
+        )
+        self._rejected = True
+
+    async def _async_import_device(self, device: QuandifyDevice, end: datetime) -> None:
+        """Import a device's history in bounded chunks, saving progress after each."""
+        checkpoint = self._checkpoints.get(device.id, {})
+        start = (
+            dt_util.parse_datetime(checkpoint["end"])
+            if "end" in checkpoint
+            else end - timedelta(days=HISTORY_BACKFILL_DAYS)
+        )
+        if start is None or start >= end:
+            return
+
+        metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{device.name} water consumption",
+            source=DOMAIN,
+            statistic_id=consumption_statistic_id(device),
+            unit_of_measurement=UnitOfVolume.LITERS,
+        )
+        last_state: float | None = checkpoint.get("state")
+        last_sum: float | None = checkpoint.get("sum")
+
+        chunk = timedelta(hours=HISTORY_CHUNK_HOURS)
+        while start < end:
+            chunk_end = min(start + chunk, end)
+
+            # Last reading of each hour in the chunk, at most HISTORY_CHUNK_HOURS entries
+            hourly: dict[datetime, tuple[datetime, float]] = {}
+            async for sample in self.coordinator.api.iter_volume_history(
+                device.id, start, chunk_end
+            ):
+                timestamp = _parse_timestamp(sample.get("timestamp"))
+                volume = sample.get("total_volume")
+                if timestamp is None or volume is None or not start <= timestamp < chunk_end:
+                    continue
+                hour = timestamp.replace(minute=0, second=0, microsecond=0)
+                if hour not in hourly or hourly[hour][0] <= timestamp:
+                    hourly[hour] = (timestamp, float(volume))
+
+            start = chunk_end
+            if chunk_end == end:
+                if not hourly:
+                    # The newest hours may still be coming in, ask for them again next run
+                    return
+                checkpoint_end = max(hourly) + timedelta(hours=1)
+            else:
+                # An empty chunk before the aggregation lag has no data to wait for
+                checkpoint_end = chunk_end
+
+            statistics: list[StatisticData] = []
+            for hour, (_, volume) in sorted(hourly.items()):
+                if last_state is None or last_sum is None:
+                    last_sum = volume
+                else:
+                    # A lower total means the meter was reset and counts from zero
+                    last_sum += volume - last_state if volume >= last_state else volume
+                last_state = volume
+                statistics.append(StatisticData(start=hour, state=volume, sum=last_sum))
+            if statistics:
+                async_add_external_statistics(self.hass, metadata, statistics)
+
+            self._checkpoints[device.id] = {
+                "end": checkpoint_end.isoformat(),
+                "state": last_state,
+                "sum": last_sum,
+            }
+            self._store.async_delay_save(lambda: dict(self._checkpoints), STORAGE_SAVE_DELAY_SECONDS)
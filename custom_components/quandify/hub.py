@@ -0,0 +1,222 @@
+"""Shared API client for the config entries of a Quandify organization."""
+import asyncio
+import contextvars
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+
+from .api import PRIORITY_POLL, InFlightRequests, QuandifyAPI
+from .const import DOMAIN, HUB_CACHE_SECONDS, TOKEN_SAVE_DELAY_SECONDS
+from .models import QuandifyDevice, QuandifyDeviceState
+from .push import QuandifyPushListener
+
+if TYPE_CHECKING:
+    from .coordinator import QuandifyDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuandifyHub:
+    """Share one API client and the device polling between config entries.
+
+    Accounts in the same organization see the same devices, so their config
+    entries share a hub: tokens are refreshed once, and only the coordinator
+    of the first entry polls. The devices it fetches are handed to the other
+    coordinators, which do not poll on their own. Device entities have the
+    same unique IDs in every entry, so only the polling entry creates them;
+    when it is unloaded, the entry taking over polling creates them instead,
+    along with the event stream for push updates if its entry enables them.
+    Identical requests that are in flight together are sent once, and a
+    payload fetched recently is reused, for example by the first refresh of
+    an entry that was just set up.
+
+    The API client uses the tokens of the first entry, the owner, and writes
+    rotated tokens back to it. When the owner is unloaded, the next entry
+    takes over with its own tokens. Tokens are only written if the client
+    rotated them and the entry still holds the tokens the hub loaded from it,
+    so tokens from reauthentication are never overwritten.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: aiohttp.ClientSession,
+        config: dict[str, Any],
+        cache_ttl: float = HUB_CACHE_SECONDS,
+        **api_kwargs: Any,
+    ):
+        """Initialize the hub and its API client."""
+        self.hass = hass
+        self.cache_ttl = cache_ttl
+        self.entries: list[ConfigEntry] = []
+        self._token_saver: Debouncer[None] = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=TOKEN_SAVE_DELAY_SECONDS,
+            immediate=False,
+            function=self._save_tokens,
+        )
+        self.api = QuandifyAPI(
+            session, config, token_listener=self._token_saver.async_schedule_call, **api_kwargs
+        )
+        # The tokens in the owner's entry data as of the last load or save
+        self._loaded_tokens = self.api.tokens
+        self._cache: dict[str, tuple[float, Any]] = {}
+        self._requests = InFlightRequests()
+        # The first coordinator polls for all of them
+        self._coordinators: list["QuandifyDataUpdateCoordinator"] = []
+        # The coordinator the event stream is running for, and its task
+        self._push: tuple["QuandifyDataUpdateCoordinator", asyncio.Task[None]] | None = None
+
+    @property
+    def owner(self) -> ConfigEntry | None:
+        """Return the config entry whose tokens the API client uses."""
+        return self.entries[0] if self.entries else None
+
+    def add_entry(self, entry: ConfigEntry) -> None:
+        """Start serving a config entry."""
+        self.entries.append(entry)
+
+    def remove_entry(self, entry: ConfigEntry) -> bool:
+        """Stop serving a config entry, returning True if no entries are left."""
+        was_owner = entry is self.owner
+        if was_owner:
+            self._flush_tokens()
+        self.entries.remove(entry)
+
+        if (owner := self.owner) is None:
+            self.api.shutdown()
+            return True
+        if was_owner:
+            _LOGGER.debug("Handing the shared Quandify API client over to %s", owner.title)
+            self.api.use_config(dict(owner.data))
+            self._loaded_tokens = self.api.tokens
+        return False
+
+    @callback
+    def async_add_coordinator(
+        self, coordinator: "QuandifyDataUpdateCoordinator"
+    ) -> CALLBACK_TYPE:
+        """Share polling with a coordinator, returning a function that removes it."""
+        self._coordinators.append(coordinator)
+        coordinator.async_set_polling(coordinator is self._coordinators[0])
+        self.async_update_push()
+        return lambda: self._async_remove_coordinator(coordinator)
+
+    @callback
+    def _async_remove_coordinator(self, coordinator: "QuandifyDataUpdateCoordinator") -> None:
+        """Stop sharing with a coordinator, handing polling over if it was polling."""
+        was_polling = coordinator is self._coordinators[0]
+        self._coordinators.remove(coordinator)
+        if was_polling and self._coordinators:
+            _LOGGER.debug("Handing polling for the organization over to another config entry")
+            self._coordinators[0].async_set_polling(True)
+        self.async_update_push()
+
+    @callback
+    def async_update_push(self) -> None:
+        """Run the event stream for the polling coordinator if its entry enables push updates.
+
+        The organization has one stream, which moves along with polling.
+        """
+        polling = self._coordinators[0] if self._coordinators else None
+        if polling is not None and not polling.push_updates:
+            polling = None
+        if self._push is not None:
+            if self._push[0] is polling:
+                return
+            self._push[1].cancel()
+            self._push = None
+        if polling is not None:
+            self._push = (
+                polling,
+                self.hass.async_create_background_task(
+                    QuandifyPushListener(polling).async_run(), f"{DOMAIN} push updates"
+                ),
+            )
+
+    @callback
+    def async_publish(
+        self,
+        source: "QuandifyDataUpdateCoordinator",
+        fetched: dict[str, QuandifyDeviceState],
+        failed: dict[str, Exception],
+    ) -> None:
+        """Hand the results of a coordinator's fetch to the other coordinators."""
+        # Outside the source's context, so its flight recorder only holds its own cycle
+        context = contextvars.Context()
+        for coordinator in self._coordinators:
+            if coordinator is not source:
+                context.run(coordinator.async_apply_results, fetched, failed)
+
+    @callback
+    def _save_tokens(self) -> None:
+        """Write rotated tokens back to the owning config entry."""
+        if (owner := self.owner) is None:
+            return
+        tokens = self.api.tokens
+        if tokens == self._loaded_tokens:
+            return
+        if {key: owner.data.get(key) for key in tokens} != self._loaded_tokens:
+            _LOGGER.debug("Config entry got new tokens elsewhere, not overwriting them")
+            return
+        _LOGGER.debug("Persisting refreshed tokens to the config entry")
+        self.hass.config_entries.async_update_entry(owner, data={**owner.data, **tokens})
+        self._loaded_tokens = tokens
+
+    @callback
+    def _flush_tokens(self) -> None:
+        """Write any rotated tokens that are still waiting for the save delay."""
+        self._token_saver.async_cancel()
+        self._save_tokens()
+
+    async def async_list_devices(
+        self, cached: bool = False, priority: int = PRIORITY_POLL
+    ) -> dict[str, tuple[QuandifyDevice, QuandifyDeviceState | None]]:
+        """List the supported devices by ID, with their state if the list has it.
+
+        The list is read page by page and only the parsed devices are kept.
+        A recent result is reused if ``cached`` is set.
+        """
+
+        async def _async_list() -> dict[str, tuple[QuandifyDevice, QuandifyDeviceState | None]]:
+            return {
+                device.id: (device, state)
+                async for device, state in self.api.iter_devices(priority)
+            }
+
+        return await self._async_request("devices", _async_list, cached)
+
+    async def async_get_device_info(
+        self, device_id: str, cached: bool = False
+    ) -> dict[str, Any]:
+        """Fetch a device payload, reusing a recent result if ``cached`` is set."""
+        return await self._async_request(
+            f"device/{device_id}", lambda: self.api.get_device_info(device_id), cached
+        )
+
+    async def _async_request(
+        self, key: str, request: Callable[[], Awaitable[Any]], cached: bool
+    ) -> Any:
+        """Run a request once for all concurrent callers and cache its result.
+
+        The request is cancelled only when every caller waiting for it is.
+        """
+        if cached and (hit := self._cache.get(key)) is not None:
+            fetched_at, result = hit
+            if time.monotonic() - fetched_at <= self.cache_ttl:
+                return result
+
+        return await self._requests.run(key, lambda: self._async_fetch(key, request))
+
+    async def _async_fetch(self, key: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a result and cache it."""
+        result = await request()
+        self._cache[key] = (time.monotonic(), result)
+        return result
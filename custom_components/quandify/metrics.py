@@ -0,0 +1,107 @@
+"""Request and refresh cycle metrics for the Quandify integration."""
+from typing import Any
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class EndpointMetrics:
+    """Request counters and a latency histogram for a single endpoint."""
+
+    __slots__ = ("requests", "errors", "bytes_received", "total_latency", "max_latency", "buckets")
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        # One bucket per bound, plus one for slower requests
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, latency: float, size: int, error: bool) -> None:
+        """Record one request, with its latency in seconds and response size in bytes."""
+        self.requests += 1
+        self.errors += error
+        self.bytes_received += size
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+        latency_ms = latency * 1000
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dictionary."""
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "average_latency_ms": round(self.total_latency / self.requests * 1000, 1)
+            if self.requests
+            else None,
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "latency_histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class QuandifyMetrics:
+    """Per-endpoint request metrics and coordinator cycle timings."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.cycles = 0
+        self.failed_cycles = 0
+        self.last_cycle_duration: float | None = None
+        self.max_cycle_duration = 0.0
+
+    def record_request(self, endpoint: str, latency: float, size: int, error: bool) -> None:
+        """Record one request to an endpoint."""
+        if (metrics := self.endpoints.get(endpoint)) is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.record(latency, size, error)
+
+    def record_cycle(self, duration: float, success: bool) -> None:
+        """Record one coordinator refresh cycle."""
+        self.cycles += 1
+        self.failed_cycles += not success
+        self.last_cycle_duration = duration
+        self.max_cycle_duration = max(self.max_cycle_duration, duration)
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests made to all endpoints."""
+        return sum(metrics.requests for metrics in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        """Return the number of failed requests to all endpoints."""
+        return sum(metrics.errors for metrics in self.endpoints.values())
+
+    @property
+    def average_latency(self) -> float | None:
+        """Return the average latency of all requests, in seconds."""
+        if not (requests := self.requests):
+            return None
+        return sum(metrics.total_latency for metrics in self.endpoints.values()) / requests
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dictionary."""
+        return {
+            "cycles": self.cycles,
+            "failed_cycles": self.failed_cycles,
+            "last_cycle_duration_ms": round(self.last_cycle_duration * 1000, 1)
+            if self.last_cycle_duration is not None
+            else None,
+            "max_cycle_duration_ms": round(self.max_cycle_duration * 1000, 1),
+            "endpoints": {
+                endpoint: metrics.as_dict() for endpoint, metrics in self.endpoints.items()
+            },
+        }
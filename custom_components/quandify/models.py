@@ -1,6 +1,36 @@
 """Models for the Quandify integration."""
 from dataclasses import dataclass
 from typing import Any
+
+# Payload paths, as used in entity description keys, for each device state attribute
+DEVICE_STATE_ATTRIBUTES: dict[str, str] = {
+    "status.total_volume": "total_volume",
+    "status.avg_water_temp": "avg_water_temp",
+    "status.ambient_temp": "ambient_temp",
+    "status.wifi_signal_strength": "wifi_signal_strength",
+    "status.rssi": "rssi",
+    "sub_type": "sub_type",
+    "leak_status.is_leak": "is_leak",
+    "status.valve_state": "valve_state",
+    # Derived by the coordinator from successive total volume readings
+    "flow_rate": "flow_rate",
+    "consumption_rate": "consumption_rate",
+}
+# Attributes that are not read from a payload
+DERIVED_STATE_ATTRIBUTES = frozenset({"flow_rate", "consumption_rate"})
+
+_MISSING = object()
+
+
+def _lookup(data: Any, path: str) -> Any:
+    """Return the value at a dotted path of a payload, or _MISSING if it is absent."""
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return _MISSING
+        data = data[key]
+    return data
+
+
 @dataclass
 class QuandifyDevice:
     """A class representing a Quandify device."""
@@ -34,4 +64,81 @@ class QuandifyDevice:
             serial=data.get("serial"),
             firmware_version=data.get("firmware_version"),
             hardware_version=hardware_version,
-        )
\ No newline at end of file
+        )
+
+
+class QuandifyDeviceState:
+    """The polled state of a Quandify device, reduced to the fields the platforms use."""
+
+    __slots__ = tuple(DEVICE_STATE_ATTRIBUTES.values())
+
+    total_volume: float | None
+    avg_water_temp: float | None
+    ambient_temp: float | None
+    wifi_signal_strength: int | None
+    rssi: int | None
+    sub_type: str | None
+    is_leak: bool | None
+    valve_state: str | None
+    flow_rate: float | None
+    consumption_rate: float | None
+
+    def __init__(self, **values: Any):
+        """Initialize the state, leaving unset attributes as None."""
+        for attribute in self.__slots__:
+            setattr(self, attribute, values.get(attribute))
+
+    @classmethod
+    def from_api(cls, data: dict[str, Any]) -> "QuandifyDeviceState":
+        """Create a device state object from a device payload."""
+        status = data.get("status") or {}
+        leak_status = data.get("leak_status") or {}
+
+        return cls(
+            total_volume=status.get("total_volume"),
+            avg_water_temp=status.get("avg_water_temp"),
+            ambient_temp=status.get("ambient_temp"),
+            wifi_signal_strength=status.get("wifi_signal_strength"),
+            rssi=status.get("rssi"),
+            sub_type=data.get("sub_type"),
+            is_leak=leak_status.get("is_leak"),
+            valve_state=status.get("valve_state"),
+        )
+
+    @staticmethod
+    def is_complete(data: dict[str, Any]) -> bool:
+        """Return True if a device payload has every field the state is read from."""
+        return all(
+            _lookup(data, path) is not _MISSING
+            for path, attribute in DEVICE_STATE_ATTRIBUTES.items()
+            if attribute not in DERIVED_STATE_ATTRIBUTES
+        )
+
+    def merge_api(self, data: dict[str, Any]) -> "QuandifyDeviceState":
+        """Return a copy of the state updated with the fields in a partial device payload."""
+        changes: dict[str, Any] = {}
+        for path, attribute in DEVICE_STATE_ATTRIBUTES.items():
+            if (value := _lookup(data, path)) is not _MISSING:
+                changes[attribute] = value
+        return self.replace(**changes) if changes else self
+
+    def replace(self, **changes: Any) -> "QuandifyDeviceState":
+        """Return a copy of the state with some attributes changed."""
+        return QuandifyDeviceState(**{**self.as_dict(), **changes})
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state as a dictionary."""
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two states field by field."""
+        if not isinstance(other, QuandifyDeviceState):
+            return NotImplemented
+        return all(
+            getattr(self, attribute) == getattr(other, attribute)
+            for attribute in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        """Return a readable representation of the state."""
+        return f"QuandifyDeviceState({self.as_dict()!r})"
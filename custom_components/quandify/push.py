@@ -0,0 +1,79 @@
+"""Push updates from the Quandify cloud's event stream."""
+import asyncio
+import logging
+import random
+from typing import TYPE_CHECKING
+
+import aiohttp
+from homeassistant.exceptions import ConfigEntryAuthFailed
+
+from .api import QuandifyAPIError
+from .const import (
+    PUSH_IDLE_TIMEOUT_SECONDS,
+    PUSH_RECONNECT_MAX_SECONDS,
+    PUSH_RECONNECT_MIN_SECONDS,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import QuandifyDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuandifyPushListener:
+    """Apply device updates from the event stream to the coordinator as they arrive.
+
+    The hub runs one listener per organization, for the polling coordinator,
+    which hands the updates on to the others. While the stream is connected
+    the coordinator only polls to reconcile,
+    at a slow interval. A dropped stream is reconnected with exponential
+    backoff, and regular polling resumes right away in the meantime.
+    """
+
+    def __init__(self, coordinator: "QuandifyDataUpdateCoordinator"):
+        """Initialize the listener."""
+        self.coordinator = coordinator
+        self._failures = 0
+
+    async def async_run(self) -> None:
+        """Listen until cancelled, reconnecting after every disconnect."""
+        try:
+            while True:
+                await self._async_listen()
+                delay = random.uniform(
+                    PUSH_RECONNECT_MIN_SECONDS,
+                    min(
+                        PUSH_RECONNECT_MAX_SECONDS,
+                        PUSH_RECONNECT_MIN_SECONDS * 2**self._failures,
+                    ),
+                )
+                self._failures += 1
+                _LOGGER.debug("Reconnecting to the Quandify event stream in %.1f s", delay)
+                await asyncio.sleep(delay)
+        finally:
+            self.coordinator.async_set_push_connected(False)
+
+    async def _async_listen(self) -> None:
+        """Apply events until the stream ends or fails."""
+        try:
+            async for payload in self.coordinator.api.iter_events(PUSH_IDLE_TIMEOUT_SECONDS):
+                if not self.coordinator.push_connected:
+                    _LOGGER.debug("Connected to the Quandify event stream")
+                    self.coordinator.async_set_push_connected(True)
+                    self._failures = 0
+                if payload is not None:
+                    self.coordinator.async_apply_push(payload)
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ValueError,
+            QuandifyAPIError,
+            ConfigEntryAuthFailed,
+        ) as err:
+            _LOGGER.debug("Quandify event stream failed: %s", err)
+        else:
+            _LOGGER.debug("Quandify event stream closed")
+
+        if self.coordinator.push_connected:
+            self.coordinator.async_set_push_connected(False)
+            await self.coordinator.async_request_refresh()
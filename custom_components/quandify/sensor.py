@@ -10,14 +10,19 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     UnitOfTemperature,
+    UnitOfTime,
     UnitOfVolume,
+    UnitOfVolumeFlowRate,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN
 from .coordinator import QuandifyDataUpdateCoordinator
-from .entity import QuandifyEntity
+from .entity import QuandifyEntity, state_getter
+from .metrics import QuandifyMetrics
 from .models import QuandifyDevice
 
 # Sensor descriptions
@@ -61,21 +66,82 @@ WATER_TYPE = SensorEntityDescription(
     name="Water type",
     icon="mdi:water-thermometer")
 
+# Rates derived from successive total volume readings
+FLOW_RATE = SensorEntityDescription(
+    key="flow_rate",
+    name="Flow rate",
+    native_unit_of_measurement=UnitOfVolumeFlowRate.LITERS_PER_MINUTE,
+    state_class=SensorStateClass.MEASUREMENT,
+    device_class=SensorDeviceClass.VOLUME_FLOW_RATE)
+
+CONSUMPTION_RATE = SensorEntityDescription(
+    key="consumption_rate",
+    name="Consumption rate",
+    native_unit_of_measurement="L/h",
+    state_class=SensorStateClass.MEASUREMENT,
+    icon="mdi:water-pump")
+
+# Diagnostic sensors for the API client, disabled by default
+LAST_CYCLE_DURATION = SensorEntityDescription(
+    key="last_cycle_duration",
+    name="Last update duration",
+    native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False)
+
+API_REQUESTS = SensorEntityDescription(
+    key="api_requests",
+    name="API requests",
+    icon="mdi:cloud-sync",
+    state_class=SensorStateClass.TOTAL_INCREASING,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False)
+
+API_ERRORS = SensorEntityDescription(
+    key="api_errors",
+    name="API errors",
+    icon="mdi:cloud-alert",
+    state_class=SensorStateClass.TOTAL_INCREASING,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False)
+
+API_LATENCY = SensorEntityDescription(
+    key="api_average_latency",
+    name="API average latency",
+    native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+    device_class=SensorDeviceClass.DURATION,
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+    entity_registry_enabled_default=False)
+
 # Sensor profiles
 DEVICE_SENSORS = {
-    "Water Grip": [TOTAL_VOLUME, WATER_TEMP, WIFI_SIGNAL, WATER_TYPE],
+    "Water Grip": [TOTAL_VOLUME, WATER_TEMP, WIFI_SIGNAL, WATER_TYPE, FLOW_RATE, CONSUMPTION_RATE],
 }
 
+METRICS_SENSORS = [LAST_CYCLE_DURATION, API_REQUESTS, API_ERRORS, API_LATENCY]
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the sensor entities."""
     coordinator: QuandifyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
-    entities: list[QuandifySensor] = []
-    for device in coordinator.devices:
-        if descriptions := DEVICE_SENSORS.get(device.model):
-            entities.extend(
-                QuandifySensor(coordinator, device, description) for description in descriptions
-            )
-    async_add_entities(entities)
+
+    @callback
+    def _async_add_devices(devices: list[QuandifyDevice]) -> None:
+        entities: list[SensorEntity] = []
+        for device in devices:
+            if descriptions := DEVICE_SENSORS.get(device.model):
+                entities.extend(
+                    QuandifySensor(coordinator, device, description) for description in descriptions
+                )
+        async_add_entities(entities)
+
+    entry.async_on_unload(coordinator.async_add_device_listener(_async_add_devices))
+    async_add_entities(
+        QuandifyMetricsSensor(entry, coordinator.api.metrics, description)
+        for description in METRICS_SENSORS
+    )
 
 class QuandifySensor(QuandifyEntity, SensorEntity):
     """Implementation of a Quandify sensor."""
@@ -85,30 +151,52 @@ class QuandifySensor(QuandifyEntity, SensorEntity):
         super().__init__(coordinator, device)
         self.entity_description = description
         self._attr_unique_id = f"{self.device.id}_{self.entity_description.key}"
+        self._get_value = state_getter(self.entity_description.key)
         self._update_attr()
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._update_attr()
-        super()._handle_coordinator_update()
-
-    def _update_attr(self) -> None:
-        """Update the state and attributes of the entity."""
-        value = self.device_data
-        if value is None:
-            self._attr_native_value = None
-            return
+    def _update_attr(self) -> bool:
+        """Update the state of the entity, returning True if it changed."""
+        state = self.device_state
+        value = self._get_value(state) if state is not None else None
 
         if self.entity_description.key == "sub_type":
-            sub_type = value.get("sub_type")
-            self._attr_native_value = sub_type.capitalize() if sub_type else None
-        else:
-            try:
-                for key_part in self.entity_description.key.split("."):
-                    if value is None:
-                        break
-                    value = value.get(key_part)
-            except AttributeError:
-                value = None
-            self._attr_native_value = value
+            value = value.capitalize() if value else None
+
+        if value == self._attr_native_value:
+            return False
+        self._attr_native_value = value
+        return True
+
+
+class QuandifyMetricsSensor(SensorEntity):
+    """Diagnostic sensor reporting API client metrics, read from memory on each poll."""
+
+    _attr_has_entity_name = True
+
+    def __init__(self, entry: ConfigEntry, metrics: QuandifyMetrics, description: SensorEntityDescription):
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._metrics = metrics
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=f"Quandify cloud ({entry.title})",
+            manufacturer="Quandify",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the metric."""
+        key = self.entity_description.key
+        if key == "last_cycle_duration":
+            duration = self._metrics.last_cycle_duration
+            return round(duration * 1000, 1) if duration is not None else None
+        if key == "api_requests":
+            return self._metrics.requests
+        if key == "api_errors":
+            return self._metrics.errors
+        if key == "api_average_latency":
+            latency = self._metrics.average_latency
+            return round(latency * 1000, 1) if latency is not None else None
+        return None
@@ -0,0 +1,87 @@
+"""Persistent snapshot of devices and state for the Quandify integration."""
+import dataclasses
+import logging
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY_SECONDS, STORAGE_VERSION
+from .flow import QuandifyFlowTracker
+from .models import QuandifyDevice, QuandifyDeviceState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuandifySnapshotStore:
+    """Store the last device list, coordinator data, volume samples and success times of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+
+    async def async_load(
+        self,
+    ) -> tuple[
+        list[QuandifyDevice],
+        dict[str, QuandifyDeviceState],
+        dict[str, list[list[float]]],
+        dict[str, datetime],
+    ] | None:
+        """Load the stored devices, state, samples and last success times.
+
+        Return None if there is no usable snapshot.
+        """
+        snapshot = await self._store.async_load()
+        if not snapshot:
+            return None
+
+        try:
+            devices = [QuandifyDevice(**device) for device in snapshot["devices"]]
+            data = {
+                device_id: QuandifyDeviceState(**state)
+                for device_id, state in snapshot["data"].items()
+            }
+            samples = snapshot.get("samples", {})
+            last_success = {
+                device_id: parsed
+                for device_id, value in snapshot.get("last_success", {}).items()
+                if (parsed := dt_util.parse_datetime(value)) is not None
+            }
+        except (KeyError, TypeError, AttributeError, ValueError) as err:
+            _LOGGER.warning("Ignoring unreadable Quandify snapshot: %s", err)
+            return None
+
+        return devices, data, samples, last_success
+
+    def async_schedule_save(
+        self,
+        devices: list[QuandifyDevice],
+        data: dict[str, QuandifyDeviceState] | None,
+        flow: QuandifyFlowTracker | None = None,
+        last_success: dict[str, datetime] | None = None,
+    ) -> None:
+        """Schedule a delayed write of the devices, state, volume samples and success times."""
+
+        def _snapshot() -> dict[str, Any]:
+            return {
+                "devices": [dataclasses.asdict(device) for device in devices],
+                "data": {
+                    device_id: state.as_dict() for device_id, state in (data or {}).items()
+                },
+                "samples": flow.as_dict() if flow is not None else {},
+                "last_success": {
+                    device_id: timestamp.isoformat()
+                    for device_id, timestamp in (last_success or {}).items()
+                },
+            }
+
+        self._store.async_delay_save(_snapshot, STORAGE_SAVE_DELAY_SECONDS)
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
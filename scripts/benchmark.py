@@ -0,0 +1,193 @@
+"""Benchmark the Quandify coordinator and entities against the mock cloud.
+
+Reports, per fleet size and refresh mode, the ``_async_update_data`` cycle
+time, the number of HTTP requests per cycle, and the cost of dispatching the
+result to the sensor and binary sensor entities.
+
+    python scripts/benchmark.py --devices 1 50 500 --cycles 5 --latency 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from custom_components.quandify.api import RequestScheduler  # noqa: E402
+from custom_components.quandify.binary_sensor import (  # noqa: E402
+    DEVICE_BINARY_SENSORS,
+    QuandifyBinarySensor,
+)
+from custom_components.quandify.coordinator import (  # noqa: E402
+    QuandifyDataUpdateCoordinator,
+)
+from custom_components.quandify.entity import QuandifyEntity  # noqa: E402
+from custom_components.quandify.hub import QuandifyHub  # noqa: E402
+from custom_components.quandify.models import QuandifyDevice  # noqa: E402
+from custom_components.quandify.sensor import DEVICE_SENSORS, QuandifySensor  # noqa: E402
+from mock_cloud import (  # noqa: E402
+    MockQuandifyCloud,
+    add_arguments,
+    options_from_arguments,
+)
+
+
+def _create_entities(
+    hass: HomeAssistant, coordinator: QuandifyDataUpdateCoordinator
+) -> tuple[list[QuandifyEntity], list[int]]:
+    """Create the sensor and binary sensor entities and count their state writes."""
+    entities: list[QuandifyEntity] = []
+    for device in coordinator.devices:
+        entities.extend(
+            QuandifySensor(coordinator, device, description)
+            for description in DEVICE_SENSORS.get(device.model, [])
+        )
+        entities.extend(
+            QuandifyBinarySensor(coordinator, device, description)
+            for description in DEVICE_BINARY_SENSORS.get(device.model, [])
+        )
+
+    writes = [0]
+    for index, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.quandify_benchmark_{index}"
+        write_state = entity.async_write_ha_state
+
+        def _counting_write(write_state=write_state) -> None:
+            writes[0] += 1
+            write_state()
+
+        entity.async_write_ha_state = _counting_write
+    return entities, writes
+
+
+async def _run(
+    hass: HomeAssistant,
+    session: aiohttp.ClientSession,
+    args: argparse.Namespace,
+    devices: int,
+    bulk_refresh: bool,
+) -> dict[str, float]:
+    """Benchmark one fleet size in one refresh mode."""
+    options = options_from_arguments(args, devices)
+    cloud = MockQuandifyCloud(dataclasses.replace(options, error_rate=0, unauthorized_rate=0))
+    await cloud.start()
+    try:
+        # Log in and list devices without injected failures
+        # Every cycle should reach the cloud, so nothing is served from the hub cache
+        hub = QuandifyHub(
+            hass,
+            session,
+            {},
+            cache_ttl=0,
+            scheduler=RequestScheduler(rate=args.rate_limit),
+            **cloud.api_kwargs(),
+        )
+        api = hub.api
+        await api.login("benchmark@example.com", "password")
+        quandify_devices = [
+            device
+            for device in map(QuandifyDevice.from_api, await api.get_devices())
+            if device is not None
+        ]
+        cloud.options = options
+        coordinator = QuandifyDataUpdateCoordinator(
+            hass,
+            hub,
+            quandify_devices,
+            max_concurrent_requests=args.concurrency,
+            bulk_refresh=bulk_refresh,
+            # Poll every device on every cycle
+            min_poll_interval=0,
+            max_poll_interval=0,
+        )
+        coordinator.data = await coordinator._async_update_data()
+        entities, writes = _create_entities(hass, coordinator)
+        for entity in entities:
+            entity._handle_coordinator_update()
+
+        cycle_times: list[float] = []
+        update_times: list[float] = []
+        requests: list[int] = []
+        state_writes: list[int] = []
+        for _ in range(args.cycles):
+            cloud.advance()
+            cloud.requests.clear()
+            writes[0] = 0
+
+            start = time.perf_counter()
+            coordinator.data = await coordinator._async_update_data()
+            cycle_times.append(time.perf_counter() - start)
+            requests.append(sum(cloud.requests.values()))
+
+            start = time.perf_counter()
+            for entity in entities:
+                entity._handle_coordinator_update()
+            update_times.append(time.perf_counter() - start)
+            state_writes.append(writes[0])
+
+        api.shutdown()
+        return {
+            "cycle_ms": statistics.mean(cycle_times) * 1000,
+            "cycle_max_ms": max(cycle_times) * 1000,
+            "requests": statistics.mean(requests),
+            "entities": len(entities),
+            "update_ms": statistics.mean(update_times) * 1000,
+            "writes": statistics.mean(state_writes),
+        }
+    finally:
+        await cloud.stop()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        async with aiohttp.ClientSession() as session:
+            print(
+                f"{'devices':>8} {'mode':>10} {'cycle ms':>10} {'max ms':>10} "
+                f"{'req/cycle':>10} {'entities':>9} {'update ms':>10} {'writes':>8}"
+            )
+            for devices in args.devices:
+                for bulk_refresh in (False, True):
+                    result = await _run(hass, session, args, devices, bulk_refresh)
+                    print(
+                        f"{devices:>8} {'bulk' if bulk_refresh else 'per-device':>10} "
+                        f"{result['cycle_ms']:>10.1f} {result['cycle_max_ms']:>10.1f} "
+                        f"{result['requests']:>10.1f} {result['entities']:>9} "
+                        f"{result['update_ms']:>10.2f} {result['writes']:>8.1f}"
+                    )
+        await hass.async_stop(force=True)
+
+
+def main() -> None:
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Client-side requests per second, 0 for no limit",
+    )
+    add_arguments(parser)
+    logging.basicConfig(level=logging.WARNING)
+    # The entities are driven directly, without an entity platform
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
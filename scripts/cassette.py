@@ -0,0 +1,581 @@
+"""Record Quandify cloud traffic as cassettes and replay them offline with a profile.
+
+Recording runs the coordinator for a number of refresh cycles against the
+Quandify cloud, or the mock cloud with ``--mock``, and saves every API
+response with its timing. Tokens and personal data are redacted, and IDs,
+serials, device names and paging cursors are replaced by stable pseudonyms,
+so cassettes can be shared:
+
+    python scripts/cassette.py record fleet.json --email me@example.com --cycles 12 --interval 300
+    python scripts/cassette.py record fleet.json --mock --mock-devices 200 --cycles 5
+
+Replaying feeds the cassette through the coordinator and the sensor, binary
+sensor and button platforms without a network, and reports the wall time,
+CPU time, allocations and state writes of each cycle followed by a cProfile
+summary:
+
+    python scripts/cassette.py replay fleet.json --speed 60 --profile-output fleet.prof
+
+Response latencies and the gaps between cycles are replayed divided by
+``--speed``; the default of 0 replays without any delays.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import getpass
+import json
+import logging
+import os
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+from homeassistant.config_entries import SOURCE_USER, ConfigEntry, current_entry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import Entity
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from custom_components.quandify import binary_sensor, button, sensor  # noqa: E402
+from custom_components.quandify.api import QuandifyAPI  # noqa: E402
+from custom_components.quandify.const import (  # noqa: E402
+    API_BASE_URL,
+    AUTH_BASE_URL,
+    CONF_ACCOUNT_ID,
+    CONF_ID_TOKEN,
+    CONF_ORGANIZATION_ID,
+    CONF_REFRESH_TOKEN,
+    DOMAIN,
+    FIREBASE_AUTH_BASE_URL,
+    FIREBASE_TOKEN_URL,
+)
+from custom_components.quandify.coordinator import (  # noqa: E402
+    QuandifyDataUpdateCoordinator,
+)
+from custom_components.quandify.hub import QuandifyHub  # noqa: E402
+from mock_cloud import (  # noqa: E402
+    MockQuandifyCloud,
+    add_arguments,
+    options_from_arguments,
+)
+
+CASSETTE_VERSION = 1
+
+# Values under these keys are dropped from recorded responses
+REDACTED_KEYS = {
+    "access_token",
+    "email",
+    "idToken",
+    "id_token",
+    "password",
+    "phone",
+    "refreshToken",
+    "refresh_token",
+    "token",
+}
+# Values under these keys are replaced by a stable pseudonym wherever they appear
+PSEUDONYM_KEYS = {
+    "account_id",
+    "cursor",
+    "id",
+    "localId",
+    "next",
+    "organization_id",
+    "serial",
+    "uid",
+}
+# Like PSEUDONYM_KEYS, but only under the given parent key, as (parent, key)
+PSEUDONYM_PATHS = {
+    ("node", "name"),
+}
+REDACTED = "**REDACTED**"
+
+# The base URLs QuandifyAPI is given during replay, by argument name
+REPLAY_URLS = {
+    "api_base_url": "https://api.cassette",
+    "auth_base_url": "https://auth.cassette",
+    "firebase_auth_base_url": "https://firebase-auth.cassette",
+    "firebase_token_url": "https://firebase-token.cassette",
+}
+DEFAULT_URLS = {
+    "api_base_url": API_BASE_URL,
+    "auth_base_url": AUTH_BASE_URL,
+    "firebase_auth_base_url": FIREBASE_AUTH_BASE_URL,
+    "firebase_token_url": FIREBASE_TOKEN_URL,
+}
+
+PLATFORMS = (sensor, binary_sensor, button)
+
+
+class _Pseudonyms:
+    """Map recorded identifiers to stable placeholder values."""
+
+    def __init__(self) -> None:
+        self._values: dict[str, str] = {}
+        self._counts: dict[str, int] = defaultdict(int)
+
+    def add(self, key: str, value: Any) -> None:
+        """Give a value a pseudonym based on the key it was found under."""
+        if isinstance(value, str) and value and value not in self._values:
+            self._counts[key] += 1
+            self._values[value] = f"{key}-{self._counts[key]}"
+
+    def collect(self, data: Any, parent: str | None = None) -> None:
+        """Give a pseudonym to every value under a pseudonym key or path in a payload."""
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if key in PSEUDONYM_KEYS or (parent, key) in PSEUDONYM_PATHS:
+                    self.add(key, value)
+                self.collect(value, key)
+        elif isinstance(data, list):
+            for value in data:
+                self.collect(value, parent)
+
+    def redact(self, data: Any) -> Any:
+        """Return a payload with secrets dropped and identifiers replaced."""
+        if isinstance(data, dict):
+            return {
+                key: REDACTED if key in REDACTED_KEYS and value else self.redact(value)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.redact(value) for value in data]
+        if isinstance(data, str):
+            return self._values.get(data, data)
+        return data
+
+    def redact_url(self, url: str) -> str:
+        """Replace the identifiers among the path segments of a URL."""
+        return "/".join(self._values.get(segment, segment) for segment in url.split("/"))
+
+
+def _request_key(method: str, url: str, params: dict[str, Any] | None) -> str:
+    """Return the key a request is matched on during replay."""
+    query = "&".join(f"{key}={value}" for key, value in sorted((params or {}).items()))
+    return f"{method.upper()} {url}?{query}"
+
+
+class RecordingSession:
+    """Wrap a client session and keep every response QuandifyAPI reads."""
+
+    def __init__(self, session: aiohttp.ClientSession, base_urls: dict[str, str]) -> None:
+        self._session = session
+        self._base_urls = base_urls
+        self._start = time.monotonic()
+        self.cycle = 0
+        self.cycle_offsets: list[float] = []
+        self.interactions: list[dict[str, Any]] = []
+
+    def start_cycle(self, cycle: int) -> None:
+        """Attribute the following requests to a refresh cycle."""
+        self.cycle = cycle
+        self.cycle_offsets.append(time.monotonic() - self._start)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> aiohttp.ClientResponse:
+        """Send a request and record its response."""
+        start = time.monotonic()
+        response = await self._session.request(method, url, **kwargs)
+        # The body is cached on the response, so QuandifyAPI can still read it
+        body = await response.read()
+        for name, base_url in self._base_urls.items():
+            if url.startswith(base_url):
+                url = REPLAY_URLS[name] + url[len(base_url):]
+                break
+        self.interactions.append(
+            {
+                "cycle": self.cycle,
+                "offset": round(start - self._start, 4),
+                "elapsed": round(time.monotonic() - start, 4),
+                "method": method,
+                "url": url,
+                "params": {
+                    key: str(value) for key, value in (kwargs.get("params") or {}).items()
+                },
+                "status": response.status,
+                "content_type": response.content_type,
+                "retry_after": response.headers.get("Retry-After"),
+                "body": body.decode(errors="replace"),
+            }
+        )
+        return response
+
+    def cassette(self, config: dict[str, Any], bulk_refresh: bool) -> dict[str, Any]:
+        """Return the recording as a redacted cassette."""
+        pseudonyms = _Pseudonyms()
+        pseudonyms.add("account_id", config.get(CONF_ACCOUNT_ID))
+        pseudonyms.add("organization_id", config.get(CONF_ORGANIZATION_ID))
+        bodies = []
+        for interaction in self.interactions:
+            try:
+                body = json.loads(interaction["body"])
+            except ValueError:
+                body = None
+            pseudonyms.collect(body)
+            bodies.append(body)
+
+        interactions = []
+        for interaction, body in zip(self.interactions, bodies):
+            interactions.append(
+                {
+                    **interaction,
+                    "url": pseudonyms.redact_url(interaction["url"]),
+                    "params": pseudonyms.redact(interaction["params"]),
+                    # Bodies that are not JSON may hold anything, so only their size is kept
+                    "body": pseudonyms.redact(body) if body is not None else "",
+                }
+            )
+        return {
+            "version": CASSETTE_VERSION,
+            "config": {
+                CONF_ACCOUNT_ID: pseudonyms.redact(config.get(CONF_ACCOUNT_ID)),
+                CONF_ORGANIZATION_ID: pseudonyms.redact(config.get(CONF_ORGANIZATION_ID)),
+            },
+            "bulk_refresh": bulk_refresh,
+            "cycles": len(self.cycle_offsets),
+            "cycle_offsets": [round(offset, 4) for offset in self.cycle_offsets],
+            "interactions": interactions,
+        }
+
+
+class _CassetteResponse:
+    """A recorded response, with the parts of aiohttp's response QuandifyAPI reads."""
+
+    def __init__(self, method: str, url: str, interaction: dict[str, Any]) -> None:
+        self.method = method
+        self.url = URL(url)
+        self.status: int = interaction["status"]
+        self.content_type: str = interaction["content_type"]
+        self.headers = CIMultiDictProxy(
+            CIMultiDict({"Retry-After": interaction["retry_after"]})
+            if interaction.get("retry_after")
+            else CIMultiDict()
+        )
+        body = interaction["body"]
+        self._body = (body if isinstance(body, str) else json.dumps(body)).encode()
+
+    async def read(self) -> bytes:
+        """Return the body."""
+        return self._body
+
+    async def json(self) -> Any:
+        """Return the body parsed as JSON."""
+        return json.loads(self._body)
+
+    async def text(self) -> str:
+        """Return the body as text."""
+        return self._body.decode()
+
+    def raise_for_status(self) -> None:
+        """Raise ClientResponseError for an error status, like aiohttp."""
+        if self.status >= 400:
+            request_info = aiohttp.RequestInfo(
+                self.url, self.method.upper(), CIMultiDictProxy(CIMultiDict()), self.url
+            )
+            raise aiohttp.ClientResponseError(
+                request_info,
+                (),
+                status=self.status,
+                message="Replayed error",
+                headers=self.headers,
+            )
+
+
+class ReplaySession:
+    """Answer requests from a cassette, in the order they were recorded.
+
+    Identical requests are answered with their recorded responses in turn,
+    and the last one is repeated once they run out. A request that is not
+    in the cassette gets a 404.
+    """
+
+    def __init__(self, cassette: dict[str, Any], speed: float) -> None:
+        self._speed = speed
+        self._responses: dict[str, deque[dict[str, Any]]] = defaultdict(deque)
+        for interaction in cassette["interactions"]:
+            key = _request_key(interaction["method"], interaction["url"], interaction["params"])
+            self._responses[key].append(interaction)
+        self.requests = 0
+        self.misses = 0
+
+    @property
+    def unused(self) -> int:
+        """Return the number of recorded responses that were not replayed."""
+        return sum(max(0, len(responses) - 1) for responses in self._responses.values())
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> _CassetteResponse:
+        """Return the next recorded response for a request."""
+        self.requests += 1
+        params = {key: str(value) for key, value in (kwargs.get("params") or {}).items()}
+        responses = self._responses.get(_request_key(method, url, params))
+        if not responses:
+            self.misses += 1
+            interaction = {"status": 404, "content_type": "text/plain", "body": "Not in cassette"}
+        else:
+            interaction = responses.popleft() if len(responses) > 1 else responses[0]
+            if self._speed > 0:
+                await asyncio.sleep(interaction["elapsed"] / self._speed)
+        return _CassetteResponse(method, url, interaction)
+
+
+async def _async_setup(
+    hass: HomeAssistant,
+    session: Any,
+    config: dict[str, Any],
+    base_urls: dict[str, str],
+    bulk_refresh: bool,
+) -> tuple[QuandifyDataUpdateCoordinator, list[Entity], list[Entity], list[int]]:
+    """Set up a coordinator and the platforms' entities like the integration does.
+
+    Return the coordinator, its entities, the entities Home Assistant would
+    poll, and a counter of state writes.
+    """
+    entry = ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="cassette",
+        data=config,
+        source=SOURCE_USER,
+        # Cycles are driven by the caller, not by the coordinator's timer
+        pref_disable_polling=True,
+    )
+    current_entry.set(entry)
+    # Every cycle should reach the session, so nothing is served from the hub cache
+    hub = QuandifyHub(hass, session, dict(config), cache_ttl=0, **base_urls)
+    hub.add_entry(entry)
+    devices = [device for device, _ in (await hub.async_list_devices()).values()]
+    coordinator = QuandifyDataUpdateCoordinator(
+        hass,
+        hub,
+        devices,
+        bulk_refresh=bulk_refresh,
+        # Poll every device on every cycle, so replay sends the recorded requests
+        min_poll_interval=0,
+        max_poll_interval=0,
+    )
+    coordinator.data = {}
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+
+    entities: list[Entity] = []
+    for platform in PLATFORMS:
+        await platform.async_setup_entry(hass, entry, entities.extend)
+
+    writes = [0]
+    for index, entity in enumerate(entities):
+        entity.hass = hass
+        entity.entity_id = f"sensor.quandify_cassette_{index}"
+        write_state = entity.async_write_ha_state
+
+        def _counting_write(write_state=write_state) -> None:
+            writes[0] += 1
+            write_state()
+
+        entity.async_write_ha_state = _counting_write
+        await entity.async_added_to_hass()
+    polled = [entity for entity in entities if entity.should_poll]
+    return coordinator, entities, polled, writes
+
+
+async def _async_record(args: argparse.Namespace, hass: HomeAssistant) -> None:
+    cloud: MockQuandifyCloud | None = None
+    base_urls = dict(DEFAULT_URLS)
+    if args.mock:
+        cloud = MockQuandifyCloud(options_from_arguments(args, args.mock_devices))
+        await cloud.start()
+        base_urls = cloud.api_kwargs()
+        email, password = "cassette@example.com", "password"
+    else:
+        if not args.email:
+            raise SystemExit("--email is required unless recording from the mock cloud")
+        email = args.email
+        password = os.environ.get("QUANDIFY_PASSWORD") or getpass.getpass("Quandify password: ")
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            # Logging in is not recorded; replay starts from a logged in client
+            api = QuandifyAPI(session, {}, **base_urls)
+            config = await api.login(email, password)
+            api.shutdown()
+
+            recorder = RecordingSession(session, base_urls)
+            coordinator, _, polled, _ = await _async_setup(
+                hass, recorder, config, base_urls, not args.per_device
+            )
+            for cycle in range(1, args.cycles + 1):
+                if cycle > 1:
+                    await asyncio.sleep(args.interval)
+                    if cloud is not None:
+                        cloud.advance()
+                recorder.start_cycle(cycle)
+                await coordinator.async_refresh()
+                for entity in polled:
+                    entity.async_write_ha_state()
+                print(f"cycle {cycle}: {len(recorder.interactions)} response(s) recorded")
+            coordinator.api.shutdown()
+    finally:
+        if cloud is not None:
+            await cloud.stop()
+
+    cassette = recorder.cassette(config, not args.per_device)
+    Path(args.cassette).write_text(json.dumps(cassette, indent=1))
+    print(f"Saved {len(cassette['interactions'])} response(s) to {args.cassette}")
+
+
+async def _async_replay(args: argparse.Namespace, hass: HomeAssistant) -> None:
+    cassette = json.loads(Path(args.cassette).read_text())
+    if cassette.get("version") != CASSETTE_VERSION:
+        raise SystemExit(f"Unsupported cassette version {cassette.get('version')}")
+
+    session = ReplaySession(cassette, args.speed)
+    config = {
+        **cassette["config"],
+        # Tokens without an expiry are never refreshed ahead of time
+        CONF_ID_TOKEN: "cassette",
+        CONF_REFRESH_TOKEN: "cassette",
+    }
+    coordinator, entities, polled, writes = await _async_setup(
+        hass, session, config, REPLAY_URLS, cassette["bulk_refresh"]
+    )
+
+    profiler = cProfile.Profile()
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    offsets: list[float] = cassette["cycle_offsets"]
+    start = time.monotonic()
+    rows: list[dict[str, float]] = []
+    for cycle, offset in enumerate(offsets, 1):
+        if args.speed > 0:
+            delay = (offset - offsets[0]) / args.speed - (time.monotonic() - start)
+            await asyncio.sleep(max(0.0, delay))
+        requests = session.requests
+        writes[0] = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        profiler.enable()
+        await coordinator.async_refresh()
+        for entity in polled:
+            entity.async_write_ha_state()
+        profiler.disable()
+        row = {
+            "cycle": cycle,
+            "wall_ms": (time.perf_counter() - wall_start) * 1000,
+            "cpu_ms": (time.process_time() - cpu_start) * 1000,
+            "requests": session.requests - requests,
+            "writes": writes[0],
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            row["net_kib"] = (current - traced_before) / 1024
+            row["peak_kib"] = (peak - traced_before) / 1024
+        rows.append(row)
+    tracemalloc.stop()
+    coordinator.api.shutdown()
+
+    columns = [
+        column
+        for column in ("wall_ms", "cpu_ms", "requests", "writes", "net_kib", "peak_kib")
+        if column in rows[0]
+    ]
+    print(
+        f"Replayed {len(rows)} cycle(s) of {len(coordinator.devices)} device(s), "
+        f"{len(entities)} entities, {'bulk' if cassette['bulk_refresh'] else 'per-device'} refresh"
+    )
+    print(f"{'cycle':>6}" + "".join(f"{column:>11}" for column in columns))
+    for row in rows:
+        print(f"{row['cycle']:>6}" + "".join(f"{row[column]:>11.1f}" for column in columns))
+    print(
+        f"{'mean':>6}"
+        + "".join(f"{statistics.mean(row[column] for row in rows):>11.1f}" for column in columns)
+    )
+    if session.misses:
+        print(f"{session.misses} request(s) were not in the cassette and got a 404")
+    if session.unused:
+        print(f"{session.unused} recorded response(s) were not replayed")
+
+    stats = pstats.Stats(profiler)
+    if args.profile_output:
+        stats.dump_stats(args.profile_output)
+    if args.report:
+        Path(args.report).write_text(json.dumps({"cycles": rows}, indent=1))
+    print()
+    stats.sort_stats(args.sort).print_stats(args.top)
+
+
+async def _async_main(
+    args: argparse.Namespace,
+    command: Callable[[argparse.Namespace, HomeAssistant], Awaitable[None]],
+) -> None:
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        # Devices missing from the device list are removed from the registry
+        await dr.async_load(hass)
+        try:
+            await command(args, hass)
+        finally:
+            await hass.async_stop(force=True)
+
+
+def main() -> None:
+    """Record or replay a cassette."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Record a cassette from the Quandify cloud")
+    record.add_argument("cassette", help="Cassette file to write")
+    record.add_argument(
+        "--email",
+        help="Quandify account; the password is read from QUANDIFY_PASSWORD or prompted for",
+    )
+    record.add_argument("--cycles", type=int, default=5, help="Refresh cycles to record")
+    record.add_argument("--interval", type=float, default=60.0, help="Seconds between cycles")
+    record.add_argument(
+        "--per-device",
+        action="store_true",
+        help="Fetch devices one by one instead of from the device list",
+    )
+    record.add_argument("--mock", action="store_true", help="Record from a local mock cloud instead")
+    record.add_argument("--mock-devices", type=int, default=50, help="Devices in the mock cloud")
+    add_arguments(record)
+    record.set_defaults(handler=_async_record)
+
+    replay = subparsers.add_parser("replay", help="Replay a cassette offline and profile it")
+    replay.add_argument("cassette", help="Cassette file to read")
+    replay.add_argument("--speed", type=float, default=0.0, help="Time compression factor, 0 for no delays")
+    replay.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        help="Skip allocation tracking, which slows the replay",
+    )
+    replay.add_argument("--profile-output", help="Write the cProfile statistics to this file")
+    replay.add_argument("--report", help="Write the per-cycle measurements to this JSON file")
+    replay.add_argument("--sort", default="cumulative", help="pstats sort key for the profile summary")
+    replay.add_argument("--top", type=int, default=25, help="Functions to list in the profile summary")
+    replay.set_defaults(handler=_async_replay)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # The entities are driven directly, without an entity platform
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+    asyncio.run(_async_main(args, args.handler))
+
+
+if __name__ == "__main__":
+    main()
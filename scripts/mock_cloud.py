@@ -0,0 +1,403 @@
+"""Local stand-in for the Quandify cloud, for development and benchmarking.
+
+Serves the Firebase, auth and device endpoints used by QuandifyAPI with a
+configurable number of devices, latency, error rate and 401 injection, and
+an event stream that pushes every device change.
+
+Run it standalone with:
+
+    python scripts/mock_cloud.py --devices 50 --latency 0.05 --port 8080
+
+and point QuandifyAPI at it through its ``*_base_url`` arguments, see
+``MockQuandifyCloud.api_kwargs``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiohttp import web
+
+ACCOUNT_ID = "mock-account"
+ORGANIZATION_ID = "mock-organization"
+
+# Spacing of history samples and number of samples per history page
+HISTORY_SAMPLE_INTERVAL = timedelta(minutes=15)
+HISTORY_PAGE_SIZE = 50
+
+# Seconds between keepalive comments on the event stream
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def make_token(ttl: float, subject: str = ACCOUNT_ID) -> str:
+    """Return an unsigned JWT with an exp claim ``ttl`` seconds from now."""
+    header = _b64(json.dumps({"alg": "none", "typ": "JWT"}).encode())
+    claims = _b64(json.dumps({"sub": subject, "exp": int(time.time() + ttl)}).encode())
+    return f"{header}.{claims}.{_b64(random.randbytes(16))}"
+
+
+def make_device(index: int) -> dict[str, Any]:
+    """Return a Water Grip payload shaped like the device endpoints' responses."""
+    return {
+        "id": f"device-{index:05d}",
+        "type": "waterfuse",
+        "hardware_version": 5,
+        "serial": f"QF{index:08d}",
+        "firmware_version": "1.2.3",
+        "sub_type": random.choice(("hot", "cold")),
+        "node": {"name": f"Water Grip {index}"},
+        "status": {
+            "total_volume": round(random.uniform(0, 100_000), 1),
+            "avg_water_temp": round(random.uniform(8, 60), 1),
+            "ambient_temp": round(random.uniform(15, 25), 1),
+            "wifi_signal_strength": random.randint(-90, -40),
+            "rssi": random.randint(-90, -40),
+            "valve_state": "open",
+        },
+        "leak_status": {"is_leak": False},
+    }
+
+
+@dataclass
+class MockCloudOptions:
+    """Behaviour of the mock cloud."""
+
+    devices: int = 1
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    unauthorized_rate: float = 0.0
+    token_ttl: float = 3600.0
+    activity_rate: float = 0.1
+    list_includes_state: bool = True
+    # Any password is accepted unless one is set
+    password: str | None = None
+
+
+@dataclass
+class MockQuandifyCloud:
+    """An aiohttp application that mimics the Quandify cloud endpoints."""
+
+    options: MockCloudOptions = field(default_factory=MockCloudOptions)
+    requests: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self) -> None:
+        """Create the devices and the application."""
+        self.devices = {
+            device["id"]: device
+            for device in (make_device(index) for index in range(self.options.devices))
+        }
+        self.id_token = make_token(self.options.token_ttl)
+        self.refresh_token = _b64(random.randbytes(24))
+        self.firebase_refresh_token = _b64(random.randbytes(24))
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.add_routes(
+            [
+                web.post("/firebase/accounts:signInWithPassword", self._firebase_sign_in),
+                web.post("/firebase/accounts:lookup", self._firebase_lookup),
+                web.post("/auth/", self._auth),
+                web.post("/auth/refresh", self._refresh),
+                web.post("/securetoken/token", self._secure_token),
+                web.get("/auth/accounts/{account_id}", self._account),
+                web.get("/api/organization/{organization_id}/events", self._events),
+                web.get("/api/organization/{organization_id}/devices/", self._devices),
+                web.get("/api/organization/{organization_id}/devices/{device_id}", self._device),
+                web.get(
+                    "/api/organization/{organization_id}/devices/{device_id}/history/volume",
+                    self._volume_history,
+                ),
+                web.post(
+                    "/api/organization/{organization_id}/devices/{device_id}/commands/{command}",
+                    self._command,
+                ),
+            ]
+        )
+        self._event_queues: set[asyncio.Queue[dict[str, Any] | None]] = set()
+        self._runner: web.AppRunner | None = None
+        self.base_url = ""
+
+    def api_kwargs(self) -> dict[str, str]:
+        """Return the QuandifyAPI base URL arguments for this server."""
+        return {
+            "api_base_url": f"{self.base_url}/api",
+            "auth_base_url": f"{self.base_url}/auth",
+            "firebase_auth_base_url": f"{self.base_url}/firebase",
+            "firebase_token_url": f"{self.base_url}/securetoken/token",
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start serving, on an ephemeral port unless one is given."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        self.disconnect_events()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def advance(self) -> None:
+        """Move time forward: a share of the devices report new consumption."""
+        for device_id, device in self.devices.items():
+            if random.random() < self.options.activity_rate:
+                device["status"]["total_volume"] = round(
+                    device["status"]["total_volume"] + random.uniform(0.5, 20), 1
+                )
+                self.publish(device_id, {"status": {"total_volume": device["status"]["total_volume"]}})
+
+    def add_device(self) -> str:
+        """Install a new device, returning its ID."""
+        device = make_device(max(int(device_id.split("-")[1]) for device_id in self.devices) + 1)
+        self.devices[device["id"]] = device
+        return device["id"]
+
+    def remove_device(self, device_id: str) -> None:
+        """Remove a device from the account."""
+        del self.devices[device_id]
+
+    def set_leak(self, device_id: str, is_leak: bool = True) -> None:
+        """Report a leak, or its end, on a device."""
+        self.devices[device_id]["leak_status"]["is_leak"] = is_leak
+        self.publish(device_id, {"leak_status": {"is_leak": is_leak}})
+
+    def publish(self, device_id: str, changes: dict[str, Any]) -> None:
+        """Send a partial device payload to every connected event stream."""
+        for queue in self._event_queues:
+            queue.put_nowait({"id": device_id, **changes})
+
+    def disconnect_events(self) -> None:
+        """Close every connected event stream."""
+        for queue in self._event_queues:
+            queue.put_nowait(None)
+
+    def expire_token(self) -> None:
+        """Invalidate the current ID token, as if it had expired server side."""
+        self.id_token = make_token(self.options.token_ttl)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        """Count requests and inject latency and failures."""
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource else request.path}"] += 1
+        if self.options.latency or self.options.jitter:
+            await asyncio.sleep(self.options.latency + random.uniform(0, self.options.jitter))
+        if random.random() < self.options.error_rate:
+            raise web.HTTPServiceUnavailable()
+        return await handler(request)
+
+    def _authorize(self, request: web.Request) -> None:
+        """Reject requests that do not carry the current ID token."""
+        if (
+            request.headers.get("Authorization") != f"Bearer {self.id_token}"
+            or random.random() < self.options.unauthorized_rate
+        ):
+            raise web.HTTPUnauthorized()
+
+    async def _firebase_sign_in(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "idToken": make_token(self.options.token_ttl),
+                "refreshToken": self.firebase_refresh_token,
+            }
+        )
+
+    async def _firebase_lookup(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"users": [{"customAttributes": json.dumps({"accountId": ACCOUNT_ID})}]}
+        )
+
+    async def _auth(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if self.options.password is not None and payload.get("password") != self.options.password:
+            raise web.HTTPUnauthorized()
+        return web.json_response(
+            {"id_token": self.id_token, "refresh_token": self.refresh_token}
+        )
+
+    async def _refresh(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if payload.get("refresh_token") != self.refresh_token:
+            raise web.HTTPUnauthorized()
+        self.id_token = make_token(self.options.token_ttl)
+        self.refresh_token = _b64(random.randbytes(24))
+        return web.json_response(
+            {"id_token": self.id_token, "refresh_token": self.refresh_token}
+        )
+
+    async def _secure_token(self, request: web.Request) -> web.Response:
+        """Exchange a Firebase refresh token like Firebase's secure token service."""
+        payload = await request.post()
+        if (
+            payload.get("grant_type") != "refresh_token"
+            or payload.get("refresh_token") != self.firebase_refresh_token
+        ):
+            raise web.HTTPBadRequest()
+        self.id_token = make_token(self.options.token_ttl)
+        self.firebase_refresh_token = _b64(random.randbytes(24))
+        return web.json_response(
+            {"id_token": self.id_token, "refresh_token": self.firebase_refresh_token}
+        )
+
+    async def _account(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        return web.json_response({"organizationId": ORGANIZATION_ID})
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        """Stream device changes as server-sent events until disconnected."""
+        self._authorize(request)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self._event_queues.add(queue)
+        try:
+            await response.write(b": connected\n\n")
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    await response.write(b": keepalive\n\n")
+                    continue
+                if event is None:
+                    break
+                await response.write(f"data: {json.dumps(event)}\n\n".encode())
+        finally:
+            self._event_queues.discard(queue)
+        return response
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        devices = list(self.devices.values())
+        offset = int(request.query.get("cursor", 0))
+        limit = int(request.query.get("limit", len(devices)))
+        next_offset = offset + limit
+        devices = devices[offset:next_offset]
+        if not self.options.list_includes_state:
+            devices = [
+                {key: value for key, value in device.items()
+                 if key not in ("status", "leak_status")}
+                for device in devices
+            ]
+        return web.json_response(
+            {
+                "data": devices,
+                "next": str(next_offset) if next_offset < len(self.devices) else None,
+            }
+        )
+
+    async def _device(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        if (device := self.devices.get(request.match_info["device_id"])) is None:
+            raise web.HTTPNotFound()
+        return web.json_response(device)
+
+    async def _volume_history(self, request: web.Request) -> web.Response:
+        """Serve a paged, synthetic total volume series ending at the current volume."""
+        self._authorize(request)
+        if (device := self.devices.get(request.match_info["device_id"])) is None:
+            raise web.HTTPNotFound()
+        start = datetime.fromisoformat(request.query["from"])
+        end = datetime.fromisoformat(request.query["to"])
+        offset = int(request.query.get("cursor", 0))
+
+        samples = []
+        timestamp = start + offset * HISTORY_SAMPLE_INTERVAL
+        while timestamp < end and len(samples) < HISTORY_PAGE_SIZE:
+            hours_ago = (time.time() - timestamp.timestamp()) / 3600
+            volume = max(0.0, device["status"]["total_volume"] - hours_ago * 2)
+            samples.append({"timestamp": timestamp.isoformat(), "total_volume": round(volume, 1)})
+            timestamp += HISTORY_SAMPLE_INTERVAL
+
+        next_offset = offset + len(samples)
+        return web.json_response(
+            {"data": samples, "next": str(next_offset) if timestamp < end else None}
+        )
+
+    async def _command(self, request: web.Request) -> web.Response:
+        self._authorize(request)
+        if (device := self.devices.get(request.match_info["device_id"])) is None:
+            raise web.HTTPNotFound()
+        command = request.match_info["command"]
+        if command == "acknowledge-alarm":
+            device["leak_status"]["is_leak"] = False
+            self.publish(device["id"], {"leak_status": {"is_leak": False}})
+        elif command in ("open-valve", "close-valve"):
+            device["status"]["valve_state"] = "open" if command == "open-valve" else "closed"
+            self.publish(device["id"], {"status": {"valve_state": device["status"]["valve_state"]}})
+        return web.json_response({})
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the mock cloud options to an argument parser."""
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--unauthorized-rate", type=float, default=0.0, help="Share of requests answered with 401")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="Lifetime of issued ID tokens, in seconds")
+    parser.add_argument("--activity-rate", type=float, default=0.1, help="Share of devices reporting consumption per step")
+    parser.add_argument(
+        "--list-without-state",
+        action="store_true",
+        help="Leave status and leak_status out of the device list",
+    )
+
+
+def options_from_arguments(args: argparse.Namespace, devices: int) -> MockCloudOptions:
+    """Build mock cloud options from parsed arguments."""
+    return MockCloudOptions(
+        devices=devices,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        token_ttl=args.token_ttl,
+        activity_rate=args.activity_rate,
+        list_includes_state=not args.list_without_state,
+    )
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    cloud = MockQuandifyCloud(options_from_arguments(args, args.devices))
+    await cloud.start(args.host, args.port)
+    print(f"Mock Quandify cloud with {args.devices} device(s) at {cloud.base_url}")
+    for name, url in cloud.api_kwargs().items():
+        print(f"  {name}={url}")
+    try:
+        while True:
+            await asyncio.sleep(60)
+            cloud.advance()
+    finally:
+        await cloud.stop()
+
+
+def main() -> None:
+    """Run the mock cloud until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=1)
+    add_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Fixtures for the Quandify tests."""
+import asyncio
+import copy
+import sys
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.quandify import api
+from custom_components.quandify.coordinator import QuandifyDataUpdateCoordinator
+from custom_components.quandify.hub import QuandifyHub
+from custom_components.quandify.metrics import QuandifyMetrics
+from custom_components.quandify.models import QuandifyDevice, QuandifyDeviceState
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from mock_cloud import MockCloudOptions, MockQuandifyCloud, make_device  # noqa: E402
+
+
+class FakeClock:
+    """A monotonic and wall clock that only moves when told to."""
+
+    def __init__(self, now: float = 1_000_000.0):
+        """Initialize the clock at a fixed time."""
+        self.now = now
+
+    def monotonic(self) -> float:
+        """Return the current monotonic time."""
+        return self.now
+
+    def time(self) -> float:
+        """Return the current wall clock time."""
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward."""
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the clock of the API module with a fake one."""
+    fake = FakeClock()
+    monkeypatch.setattr(api, "time", fake)
+    return fake
+
+
+@asynccontextmanager
+async def async_test_home_assistant(config_dir: Path) -> AsyncIterator[HomeAssistant]:
+    """Run a bare Home Assistant instance for the duration of a test."""
+    hass = HomeAssistant(str(config_dir))
+    try:
+        yield hass
+    finally:
+        await hass.async_stop(force=True)
+
+
+@asynccontextmanager
+async def async_mock_cloud(**options: Any) -> AsyncIterator[MockQuandifyCloud]:
+    """Serve the mock cloud with the given options for the duration of a test."""
+    cloud = MockQuandifyCloud(MockCloudOptions(**options))
+    await cloud.start()
+    try:
+        yield cloud
+    finally:
+        await cloud.stop()
+
+
+class FakeQuandifyAPI:
+    """Stand in for QuandifyAPI with device payloads the test can change at any time.
+
+    A device ID in ``failing`` makes its requests raise, ``command_gate``
+    holds commands until it is set, and the event stream yields what is put
+    in ``events``.
+    """
+
+    def __init__(self, devices: int = 2):
+        """Initialize with the given number of devices."""
+        self.payloads = {
+            payload["id"]: payload for payload in (make_device(index) for index in range(devices))
+        }
+        self.calls: Counter[str] = Counter()
+        self.failing: set[str] = set()
+        self.command_gate = asyncio.Event()
+        self.command_gate.set()
+        self.events: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        self.metrics = QuandifyMetrics()
+        self.tokens: dict[str, Any] = {}
+
+    @property
+    def devices(self) -> list[QuandifyDevice]:
+        """Return the devices of the payloads."""
+        return [QuandifyDevice.from_api(payload) for payload in self.payloads.values()]
+
+    def set_status(self, device_id: str, **status: Any) -> None:
+        """Change the status fields of a device."""
+        self.payloads[device_id]["status"].update(status)
+
+    async def get_device_info(self, device_id: str) -> dict[str, Any]:
+        """Return a device payload."""
+        self.calls["get_device_info"] += 1
+        if device_id in self.failing:
+            raise api.QuandifyAPIError(f"{device_id} is unreachable")
+        return copy.deepcopy(self.payloads[device_id])
+
+    async def iter_devices(
+        self, priority: int = api.PRIORITY_POLL
+    ) -> AsyncIterator[tuple[QuandifyDevice, QuandifyDeviceState | None]]:
+        """Yield the devices with their state, like the device list."""
+        self.calls["iter_devices"] += 1
+        for payload in self.payloads.values():
+            if payload["id"] not in self.failing:
+                yield QuandifyDevice.from_api(payload), QuandifyDeviceState.from_api(payload)
+
+    async def iter_events(self, idle_timeout: float) -> AsyncIterator[dict[str, Any] | None]:
+        """Yield the events put in the queue, starting with the stream opening."""
+        self.calls["iter_events"] += 1
+        yield None
+        while True:
+            yield await self.events.get()
+
+    async def close_valve(self, device_id: str) -> None:
+        """Accept a close valve command, without the device acting on it."""
+        self.calls["close_valve"] += 1
+        await self.command_gate.wait()
+
+    async def open_valve(self, device_id: str) -> None:
+        """Accept an open valve command, without the device acting on it."""
+        self.calls["open_valve"] += 1
+        await self.command_gate.wait()
+
+    def shutdown(self) -> None:
+        """Do nothing, there is no token refresh to cancel."""
+
+
+@asynccontextmanager
+async def async_test_hub(
+    hass: HomeAssistant, fake_api: FakeQuandifyAPI
+) -> AsyncIterator[QuandifyHub]:
+    """Return a hub whose requests go to a fake API."""
+    async with aiohttp.ClientSession() as session:
+        hub = QuandifyHub(hass, session, {}, cache_ttl=0)
+        hub.api = fake_api  # type: ignore[assignment]
+        yield hub
+
+
+def make_coordinator(
+    hass: HomeAssistant, hub: QuandifyHub, **kwargs: Any
+) -> QuandifyDataUpdateCoordinator:
+    """Return a coordinator for all devices of the hub's fake API."""
+    kwargs.setdefault("bulk_refresh", False)
+    return QuandifyDataUpdateCoordinator(hass, hub, hub.api.devices, **kwargs)
+
+
+async def async_wait_for(predicate: Callable[[], bool], timeout: float = 2) -> None:
+    """Wait until ``predicate`` is true, letting other tasks run."""
+    async with asyncio.timeout(timeout):
+        while not predicate():
+            await asyncio.sleep(0.001)
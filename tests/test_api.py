@@ -0,0 +1,447 @@
+"""Tests for the request primitives of the Quandify API client."""
+import asyncio
+
+import aiohttp
+import pytest
+from homeassistant.exceptions import ConfigEntryAuthFailed
+
+from custom_components.quandify import api
+from custom_components.quandify.api import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    CircuitBreaker,
+    QuandifyAPI,
+    InFlightRequests,
+    QuandifyAPIError,
+    QuandifyCircuitOpenError,
+    RequestScheduler,
+    _backoff_delay,
+    _retry_after,
+)
+from custom_components.quandify.const import (
+    CONF_ACCOUNT_ID,
+    CONF_FIREBASE_REFRESH_TOKEN,
+    CONF_ID_TOKEN,
+    CONF_ORGANIZATION_ID,
+    CONF_REFRESH_TOKEN,
+    RETRY_BACKOFF_BASE_SECONDS,
+    RETRY_BACKOFF_MAX_SECONDS,
+)
+
+from .conftest import FakeClock, async_mock_cloud, make_device
+
+
+async def _advance(clock: FakeClock, scheduler: RequestScheduler, seconds: float) -> None:
+    """Move the clock forward and fire the scheduler's wake-up timer right away."""
+    clock.advance(seconds)
+    if scheduler._timer is not None:
+        scheduler._timer.cancel()
+        scheduler._on_timer()
+    # Let the granted waiters resume
+    await asyncio.sleep(0)
+
+
+def test_scheduler_burst_then_waits(clock: FakeClock) -> None:
+    """A full bucket lets a burst through, after which requests wait for a token."""
+
+    async def scenario() -> None:
+        scheduler = RequestScheduler(rate=2, burst=3)
+        for _ in range(3):
+            await scheduler.acquire()
+
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        await _advance(clock, scheduler, 0.25)
+        assert not waiter.done()
+        await _advance(clock, scheduler, 0.25)
+        assert waiter.done()
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_refill_capped_at_burst(clock: FakeClock) -> None:
+    """Tokens refill at the rate, but never beyond the burst size."""
+
+    async def scenario() -> None:
+        scheduler = RequestScheduler(rate=2, burst=3)
+        for _ in range(3):
+            await scheduler.acquire()
+
+        clock.advance(1)
+        for _ in range(2):
+            await asyncio.wait_for(scheduler.acquire(), 0.1)
+        assert scheduler._tokens < 1
+
+        clock.advance(3600)
+        for _ in range(3):
+            await asyncio.wait_for(scheduler.acquire(), 0.1)
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        waiter.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_priority_order(clock: FakeClock) -> None:
+    """Waiting requests get tokens by priority, then in arrival order."""
+
+    async def scenario() -> None:
+        scheduler = RequestScheduler(rate=1, burst=1)
+        await scheduler.acquire()
+
+        order: list[str] = []
+
+        async def request(name: str, priority: int) -> None:
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.ensure_future(request(name, priority))
+            for name, priority in (
+                ("background", PRIORITY_BACKGROUND),
+                ("poll 1", PRIORITY_POLL),
+                ("command", PRIORITY_COMMAND),
+                ("poll 2", PRIORITY_POLL),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert order == []
+
+        for _ in tasks:
+            await _advance(clock, scheduler, 1)
+        assert order == ["command", "poll 1", "poll 2", "background"]
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_cancelled_waiter_skipped(clock: FakeClock) -> None:
+    """A cancelled waiter does not use up a token."""
+
+    async def scenario() -> None:
+        scheduler = RequestScheduler(rate=1, burst=1)
+        await scheduler.acquire()
+
+        cancelled = asyncio.ensure_future(scheduler.acquire(PRIORITY_COMMAND))
+        waiter = asyncio.ensure_future(scheduler.acquire(PRIORITY_POLL))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+
+        await _advance(clock, scheduler, 1)
+        assert waiter.done()
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_rate_zero_unlimited(clock: FakeClock) -> None:
+    """A rate of 0 never makes a request wait."""
+
+    async def scenario() -> None:
+        scheduler = RequestScheduler(rate=0, burst=1)
+        for _ in range(100):
+            await asyncio.wait_for(scheduler.acquire(), 0.1)
+
+    asyncio.run(scenario())
+
+
+def test_circuit_breaker_opens_at_threshold(clock: FakeClock) -> None:
+    """The circuit stays closed below the threshold and opens when it is reached."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+        breaker.before_request()
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(QuandifyCircuitOpenError):
+        breaker.before_request()
+
+
+def test_circuit_breaker_success_resets_failures(clock: FakeClock) -> None:
+    """A success in between starts the failure count over."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_half_open_probe_closes(clock: FakeClock) -> None:
+    """After the reset timeout one probe is let through, and its success closes the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+
+    clock.advance(59)
+    with pytest.raises(QuandifyCircuitOpenError):
+        breaker.before_request()
+
+    clock.advance(1)
+    breaker.before_request()
+    # Other callers wait for the probe's outcome
+    with pytest.raises(QuandifyCircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_request()
+
+
+def test_circuit_breaker_half_open_probe_reopens(clock: FakeClock) -> None:
+    """A failed probe opens the circuit for another reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+
+    clock.advance(60)
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    clock.advance(59)
+    with pytest.raises(QuandifyCircuitOpenError):
+        breaker.before_request()
+    clock.advance(1)
+    breaker.before_request()
+
+
+def test_in_flight_requests_shared() -> None:
+    """Concurrent callers with the same key share one request."""
+
+    async def scenario() -> None:
+        in_flight = InFlightRequests()
+        calls = 0
+        release = asyncio.Event()
+
+        async def request() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "state"
+
+        first = asyncio.ensure_future(in_flight.run("device", request))
+        second = asyncio.ensure_future(in_flight.run("device", request))
+        other = asyncio.ensure_future(in_flight.run("other", request))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(first, second, other) == ["state"] * 3
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_in_flight_requests_shared_exception() -> None:
+    """Every caller of a shared request gets its exception, and the next call runs again."""
+
+    async def scenario() -> None:
+        in_flight = InFlightRequests()
+        calls = 0
+        release = asyncio.Event()
+
+        async def request() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            raise QuandifyAPIError("boom")
+
+        callers = [asyncio.ensure_future(in_flight.run("device", request)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert calls == 1
+        assert all(isinstance(result, QuandifyAPIError) for result in results)
+        assert results[0] is results[1]
+
+        with pytest.raises(QuandifyAPIError):
+            await in_flight.run("device", request)
+        assert calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_in_flight_requests_cancelled_with_last_caller() -> None:
+    """A shared request keeps running until the last caller is cancelled."""
+
+    async def scenario() -> None:
+        in_flight = InFlightRequests()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def request() -> None:
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.ensure_future(in_flight.run("device", request))
+        second = asyncio.ensure_future(in_flight.run("device", request))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        second.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        (None, None),
+        ({}, None),
+        ({"Retry-After": "12"}, 12.0),
+        ({"Retry-After": "1.5"}, 1.5),
+        ({"Retry-After": "-5"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+        ({"Retry-After": ""}, None),
+    ],
+)
+def test_retry_after_seconds(headers: dict[str, str] | None, expected: float | None) -> None:
+    """A Retry-After header in seconds is parsed, and invalid values are ignored."""
+    assert _retry_after(headers) == expected
+
+
+def test_retry_after_http_date(clock: FakeClock) -> None:
+    """A Retry-After HTTP date is turned into the delay from now, never negative."""
+    # Wed, 21 Oct 2015 07:28:00 GMT
+    clock.now = 1445412480.0 - 30
+    headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    assert _retry_after(headers) == pytest.approx(30.0)
+
+    clock.advance(60)
+    assert _retry_after(headers) == 0.0
+
+
+@pytest.mark.parametrize(
+    ("attempt", "cap"),
+    [
+        (0, RETRY_BACKOFF_BASE_SECONDS),
+        (1, 2 * RETRY_BACKOFF_BASE_SECONDS),
+        (2, 4 * RETRY_BACKOFF_BASE_SECONDS),
+        (20, RETRY_BACKOFF_MAX_SECONDS),
+    ],
+)
+def test_backoff_delay_bounds(monkeypatch: pytest.MonkeyPatch, attempt: int, cap: float) -> None:
+    """The backoff is drawn between 0 and the exponential delay, capped at the maximum."""
+    bounds: list[tuple[float, float]] = []
+
+    def uniform(low: float, high: float) -> float:
+        bounds.append((low, high))
+        return high
+
+    monkeypatch.setattr(api.random, "uniform", uniform)
+    assert _backoff_delay(attempt) == cap
+    assert bounds == [(0, cap)]
+
+
+def test_backoff_delay_jitter() -> None:
+    """The real backoff stays within its bounds."""
+    for attempt in range(10):
+        cap = min(RETRY_BACKOFF_MAX_SECONDS, RETRY_BACKOFF_BASE_SECONDS * 2**attempt)
+        assert all(0 <= _backoff_delay(attempt) <= cap for _ in range(50))
+
+
+def test_refresh_falls_back_to_firebase_refresh_token() -> None:
+    """A rejected Quandify refresh token is recovered with the Firebase one from the sign-in."""
+
+    async def scenario() -> None:
+        async with async_mock_cloud() as cloud, aiohttp.ClientSession() as session:
+            client = QuandifyAPI(session, {}, **cloud.api_kwargs())
+            config = await client.login("me@example.com", "secret")
+            firebase_token = config[CONF_FIREBASE_REFRESH_TOKEN]
+            assert firebase_token == cloud.firebase_refresh_token
+            assert config[CONF_REFRESH_TOKEN] != firebase_token
+
+            cloud.refresh_token = "revoked"
+            cloud.requests.clear()
+            assert await client._refresh_token()
+
+            assert cloud.requests["POST /auth/refresh"] == 1
+            assert cloud.requests["POST /securetoken/token"] == 1
+            assert client.tokens[CONF_ID_TOKEN] == cloud.id_token
+            assert client.tokens[CONF_FIREBASE_REFRESH_TOKEN] == cloud.firebase_refresh_token
+            assert client.tokens[CONF_FIREBASE_REFRESH_TOKEN] != firebase_token
+            client.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_refresh_without_firebase_refresh_token() -> None:
+    """Without a Firebase refresh token, a rejected refresh asks for reauthentication at once."""
+
+    async def scenario() -> None:
+        async with async_mock_cloud() as cloud, aiohttp.ClientSession() as session:
+            client = QuandifyAPI(
+                session,
+                {CONF_ACCOUNT_ID: "account", CONF_ORGANIZATION_ID: "organization"},
+                **cloud.api_kwargs(),
+            )
+            await client.login("me@example.com", "secret")
+            assert client.tokens[CONF_FIREBASE_REFRESH_TOKEN] is None
+
+            cloud.refresh_token = "revoked"
+            cloud.requests.clear()
+            with pytest.raises(ConfigEntryAuthFailed):
+                await client._refresh_token()
+            assert cloud.requests["POST /securetoken/token"] == 0
+            client.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_login_wrong_password_is_auth_failure() -> None:
+    """A password the auth endpoint rejects fails authentication, not the connection."""
+
+    async def scenario() -> None:
+        async with async_mock_cloud(password="secret") as cloud, aiohttp.ClientSession() as session:
+            client = QuandifyAPI(
+                session,
+                {CONF_ACCOUNT_ID: "account", CONF_ORGANIZATION_ID: "organization"},
+                **cloud.api_kwargs(),
+            )
+            with pytest.raises(ConfigEntryAuthFailed):
+                await client.login("me@example.com", "wrong")
+
+    asyncio.run(scenario())
+
+
+def test_iter_devices_state_only_from_complete_entries() -> None:
+    """A list entry missing any field the state is read from leaves the device to be fetched."""
+    complete = make_device(0)
+    partial_status = make_device(1)
+    del partial_status["status"]["total_volume"]
+    no_leak_status = make_device(2)
+    del no_leak_status["leak_status"]["is_leak"]
+    unsupported = {**make_device(3), "type": "other"}
+
+    async def scenario() -> None:
+        async with aiohttp.ClientSession() as session:
+            client = QuandifyAPI(session, {})
+
+            async def iter_device_pages(**kwargs: object):
+                yield [complete, partial_status]
+                yield [no_leak_status, unsupported]
+
+            client.iter_device_pages = iter_device_pages  # type: ignore[method-assign]
+            listed = {device.id: state async for device, state in client.iter_devices()}
+
+        assert list(listed) == [complete["id"], partial_status["id"], no_leak_status["id"]]
+        state = listed[complete["id"]]
+        assert state is not None
+        assert state.total_volume == complete["status"]["total_volume"]
+        assert listed[partial_status["id"]] is None
+        assert listed[no_leak_status["id"]] is None
+
+    asyncio.run(scenario())
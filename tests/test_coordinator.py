@@ -0,0 +1,390 @@
+"""Tests for the Quandify coordinator."""
+import asyncio
+from collections.abc import Awaitable
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.quandify import coordinator as coordinator_module
+from custom_components.quandify.const import DEFAULT_MAX_POLL_INTERVAL_SECONDS
+from custom_components.quandify.coordinator import QuandifyPollScheduler
+from custom_components.quandify.models import QuandifyDeviceState
+from custom_components.quandify.sensor import TOTAL_VOLUME, WATER_TEMP, QuandifySensor
+
+from .conftest import (
+    FakeClock,
+    FakeQuandifyAPI,
+    async_test_home_assistant,
+    async_test_hub,
+    async_wait_for,
+    make_coordinator,
+)
+
+
+def _state(total_volume: float, is_leak: bool = False) -> QuandifyDeviceState:
+    """Return a device state with the fields the poll scheduler reads."""
+    return QuandifyDeviceState(total_volume=total_volume, is_leak=is_leak)
+
+
+@pytest.fixture
+def scheduler() -> QuandifyPollScheduler:
+    """Return a scheduler polling between 1 and 16 minutes, starting at 4."""
+    return QuandifyPollScheduler(base_interval=240, min_interval=60, max_interval=960)
+
+
+def test_poll_scheduler_idle_backs_off(scheduler: QuandifyPollScheduler) -> None:
+    """An idle device starts at the base interval and backs off up to the maximum."""
+    scheduler.observe("device", _state(10), 0)
+    assert scheduler.interval("device") == 240
+
+    intervals = []
+    for now in range(1, 5):
+        scheduler.observe("device", _state(10), now)
+        intervals.append(scheduler.interval("device"))
+    assert intervals == [480, 960, 960, 960]
+
+
+def test_poll_scheduler_activity_polls_at_minimum(scheduler: QuandifyPollScheduler) -> None:
+    """Flowing water or a leak brings a device down to the minimum interval."""
+    for now in range(3):
+        scheduler.observe("device", _state(10), now)
+    assert scheduler.interval("device") == 960
+
+    scheduler.observe("device", _state(12), 3)
+    assert scheduler.interval("device") == 60
+    assert not scheduler.is_due("device", 3 + 30)
+    assert scheduler.is_due("device", 3 + 60)
+
+    scheduler.observe("device", _state(12), 4)
+    assert scheduler.interval("device") == 120
+
+    scheduler.observe("device", _state(12, is_leak=True), 5)
+    assert scheduler.interval("device") == 60
+
+
+def test_poll_scheduler_defer_honors_retry_after(scheduler: QuandifyPollScheduler) -> None:
+    """A failed device is retried after its interval, or later if the cloud asks to wait."""
+    scheduler.observe("device", _state(10), 0)
+
+    scheduler.defer("device", 100)
+    assert not scheduler.is_due("device", 100 + 238)
+    assert scheduler.is_due("device", 100 + 240)
+
+    scheduler.defer("device", 100, retry_after=1800)
+    assert not scheduler.is_due("device", 100 + 1798)
+    assert scheduler.is_due("device", 100 + 1800)
+
+    scheduler.defer("device", 100, retry_after=5)
+    assert not scheduler.is_due("device", 100 + 238)
+
+
+def test_poll_scheduler_set_max_interval(scheduler: QuandifyPollScheduler) -> None:
+    """Lowering the maximum clamps the intervals and brings due times forward."""
+    for now in range(3):
+        scheduler.observe("device", _state(10), now)
+    assert scheduler.interval("device") == 960
+
+    scheduler.set_max_interval(300, 10)
+    assert scheduler.max_interval == 300
+    assert scheduler.base_interval == 240
+    assert scheduler.interval("device") == 300
+    assert scheduler.is_due("device", 10 + 300)
+
+    scheduler.set_max_interval(30, 10)
+    assert scheduler.max_interval == scheduler.min_interval == 60
+    assert scheduler.base_interval == 60
+
+
+def test_poll_scheduler_next_refresh_in(scheduler: QuandifyPollScheduler) -> None:
+    """The next refresh is when the first device is due, within the interval bounds."""
+    assert scheduler.next_refresh_in(0) == 240
+
+    scheduler.observe("idle", _state(10), 0)
+    scheduler.observe("busy", _state(10), 0)
+    scheduler.observe("busy", _state(11), 100)
+    assert scheduler.next_refresh_in(100) == 60
+    assert scheduler.next_refresh_in(150) == 60
+
+    scheduler.forget("busy")
+    assert scheduler.next_refresh_in(100) == 140
+    # An overdue device is polled at the minimum interval, not right away
+    assert scheduler.next_refresh_in(1000) == 60
+
+
+@pytest.fixture
+def fast_confirm(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Poll for command confirmations without waiting seconds."""
+    monkeypatch.setattr(coordinator_module, "COMMAND_CONFIRM_DELAYS", (0.01,) * 3)
+
+
+def test_command_repeated_press_sent_once(tmp_path: Path, fast_confirm: None) -> None:
+    """A second press while the command is in flight or being confirmed is ignored."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=1)
+            device_id = next(iter(fake_api.payloads))
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub)
+                await coordinator.async_refresh()
+
+                def press() -> Awaitable[None]:
+                    return coordinator.async_send_command(
+                        device_id, "close_valve", {"valve_state": "closed"}
+                    )
+
+                fake_api.command_gate.clear()
+                first = asyncio.ensure_future(press())
+                await async_wait_for(lambda: fake_api.calls["close_valve"] == 1)
+                await press()
+                fake_api.command_gate.set()
+                await first
+
+                # Still being confirmed
+                await press()
+                assert fake_api.calls["close_valve"] == 1
+                await coordinator.async_shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_command_optimistic_until_confirmed(tmp_path: Path, fast_confirm: None) -> None:
+    """The expected value stays shown until the device reports it, other fields pass through."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=1)
+            device_id = next(iter(fake_api.payloads))
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub)
+                await coordinator.async_refresh()
+                assert coordinator.data[device_id].valve_state == "open"
+
+                await coordinator.async_send_command(
+                    device_id, "close_valve", {"valve_state": "closed"}
+                )
+                assert coordinator.data[device_id].valve_state == "closed"
+
+                # The device has not acted yet, but reports a leak
+                fake_api.payloads[device_id]["leak_status"]["is_leak"] = True
+                polls = fake_api.calls["get_device_info"]
+                await async_wait_for(lambda: fake_api.calls["get_device_info"] > polls)
+                await asyncio.sleep(0)
+                assert coordinator.data[device_id].valve_state == "closed"
+                assert coordinator.data[device_id].is_leak is True
+
+                fake_api.set_status(device_id, valve_state="closed")
+                await async_wait_for(lambda: not coordinator._command_tasks)
+                assert coordinator._pending_states == {}
+                assert coordinator.data[device_id].valve_state == "closed"
+
+                # Confirmed values no longer hide what the device reports
+                fake_api.set_status(device_id, valve_state="open")
+                await coordinator.async_refresh_devices([device_id])
+                assert coordinator.data[device_id].valve_state == "open"
+
+    asyncio.run(scenario())
+
+
+def test_command_not_confirmed_in_time(
+    tmp_path: Path, fast_confirm: None, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Once the confirmation schedule runs out, the state the device reports is shown."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=1)
+            device_id = next(iter(fake_api.payloads))
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub)
+                await coordinator.async_refresh()
+                polls = fake_api.calls["get_device_info"]
+
+                await coordinator.async_send_command(
+                    device_id, "close_valve", {"valve_state": "closed"}
+                )
+                await async_wait_for(lambda: not coordinator._command_tasks)
+
+                assert coordinator._pending_states == {}
+                assert coordinator.data[device_id].valve_state == "open"
+                # One poll per confirmation delay, and one after giving up
+                assert fake_api.calls["get_device_info"] - polls == 4
+
+    asyncio.run(scenario())
+    assert "did not confirm" in caplog.text
+
+
+@pytest.fixture
+def poll_clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Replace the monotonic and wall clocks of the coordinator with a fake one."""
+    fake = FakeClock()
+    monkeypatch.setattr(coordinator_module, "time", fake)
+    monkeypatch.setattr(
+        coordinator_module,
+        "dt_util",
+        SimpleNamespace(utcnow=lambda: datetime.fromtimestamp(fake.now, timezone.utc)),
+    )
+    return fake
+
+
+def test_poll_partial_failure_keeps_state_until_stale(
+    tmp_path: Path, poll_clock: FakeClock
+) -> None:
+    """A failing device keeps its state for the stale timeout, without failing the others."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            healthy, failing = fake_api.payloads
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub, stale_timeout=timedelta(minutes=15))
+                await coordinator.async_refresh()
+                assert coordinator.is_device_available(failing)
+
+                fake_api.failing.add(failing)
+                poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                await coordinator.async_refresh()
+                assert coordinator.last_update_success
+                assert coordinator.is_device_stale(failing)
+                assert coordinator.is_device_available(failing)
+                assert not coordinator.is_device_stale(healthy)
+
+                poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                await coordinator.async_refresh()
+                assert coordinator.last_update_success
+                assert not coordinator.is_device_available(failing)
+                assert coordinator.is_device_available(healthy)
+                assert coordinator.changed_device_ids == {failing}
+                # The last good state is kept, only marked unavailable
+                assert failing in coordinator.data
+
+                # Back once it responds again
+                fake_api.failing.clear()
+                poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                await coordinator.async_refresh()
+                assert coordinator.is_device_available(failing)
+                assert coordinator.changed_device_ids == {failing}
+
+    asyncio.run(scenario())
+
+
+def test_poll_fails_once_no_device_is_usable(tmp_path: Path, poll_clock: FakeClock) -> None:
+    """The update only fails when every device has failed past the stale timeout."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub, stale_timeout=timedelta(minutes=5))
+                await coordinator.async_refresh()
+
+                fake_api.failing.update(fake_api.payloads)
+                poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                await coordinator.async_refresh()
+                assert not coordinator.last_update_success
+                assert not any(
+                    coordinator.is_device_available(device_id) for device_id in fake_api.payloads
+                )
+
+    asyncio.run(scenario())
+
+
+def test_entities_write_only_on_change(tmp_path: Path, poll_clock: FakeClock) -> None:
+    """An unchanged poll writes no state, a changed device only writes its own entities."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            first, second = fake_api.devices
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub, stale_timeout=timedelta(minutes=15))
+                await coordinator.async_refresh()
+                writes: dict[str, int] = {}
+                for device, description in (
+                    (first, TOTAL_VOLUME),
+                    (first, WATER_TEMP),
+                    (second, TOTAL_VOLUME),
+                ):
+                    sensor = QuandifySensor(coordinator, device, description)
+                    unique_id = sensor.unique_id
+                    writes[unique_id] = 0
+
+                    def count(unique_id: str = unique_id) -> None:
+                        writes[unique_id] += 1
+
+                    sensor.async_write_ha_state = count  # type: ignore[method-assign]
+                    coordinator.async_add_listener(sensor._handle_coordinator_update)
+
+                async def poll() -> dict[str, int]:
+                    before = dict(writes)
+                    poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                    await coordinator.async_refresh()
+                    return {key: count - before[key] for key, count in writes.items()}
+
+                # The first update after being added writes the availability
+                assert set((await poll()).values()) == {1}
+                assert set((await poll()).values()) == {0}
+
+                fake_api.set_status(first.id, total_volume=2000)
+                assert await poll() == {
+                    f"{first.id}_status.total_volume": 1,
+                    f"{first.id}_status.avg_water_temp": 0,
+                    f"{second.id}_status.total_volume": 0,
+                }
+
+                # Going unavailable writes the failed device's entities only
+                fake_api.failing.add(second.id)
+                assert set((await poll()).values()) == {0}
+                assert await poll() == {
+                    f"{first.id}_status.total_volume": 0,
+                    f"{first.id}_status.avg_water_temp": 0,
+                    f"{second.id}_status.total_volume": 1,
+                }
+                await coordinator.async_shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_device_refresh_merges_states(tmp_path: Path, poll_clock: FakeClock) -> None:
+    """A refresh of some devices merges their state and notifies only if something changed."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            refreshed, other = fake_api.payloads
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub, stale_timeout=timedelta(minutes=5))
+                await coordinator.async_refresh()
+                updates = 0
+
+                def count() -> None:
+                    nonlocal updates
+                    updates += 1
+
+                coordinator.async_add_listener(count)
+
+                await coordinator.async_refresh_devices([refreshed])
+                assert updates == 0
+
+                fake_api.set_status(refreshed, total_volume=2000)
+                before = coordinator.data[other]
+                poll_clock.advance(60)
+                await coordinator.async_refresh_devices([refreshed])
+                assert updates == 1
+                assert coordinator.changed_device_ids == {refreshed}
+                assert coordinator.data[refreshed].total_volume == 2000
+                assert coordinator.data[other] is before
+
+                # Failing past the stale timeout changes only the availability
+                fake_api.failing.add(refreshed)
+                poll_clock.advance(DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+                await coordinator.async_refresh_devices([refreshed])
+                assert updates == 2
+                assert coordinator.changed_device_ids == {refreshed}
+                assert not coordinator.is_device_available(refreshed)
+                assert coordinator.is_device_available(other)
+                await coordinator.async_shutdown()
+
+    asyncio.run(scenario())
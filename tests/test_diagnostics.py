@@ -0,0 +1,50 @@
+"""Tests for the Quandify diagnostics."""
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homeassistant.components.diagnostics import REDACTED
+
+from custom_components.quandify.const import (
+    CONF_EMAIL,
+    CONF_REFRESH_TOKEN,
+    DIAGNOSTICS_RAW_PAYLOAD_DEVICES,
+    DOMAIN,
+)
+from custom_components.quandify.diagnostics import async_get_config_entry_diagnostics
+
+from .conftest import FakeQuandifyAPI, async_test_home_assistant, async_test_hub, make_coordinator
+
+
+def test_diagnostics_bounded_and_redacted(tmp_path: Path) -> None:
+    """Only a few raw payloads are fetched, and none of them identify the device."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=DIAGNOSTICS_RAW_PAYLOAD_DEVICES + 3)
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub)
+                entry = MagicMock(
+                    entry_id="entry",
+                    title="user@example.com",
+                    data={CONF_EMAIL: "user@example.com", CONF_REFRESH_TOKEN: "secret"},
+                    options={},
+                )
+                hass.data[DOMAIN] = {entry.entry_id: coordinator}
+
+                diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+            assert fake_api.calls["get_device_info"] == DIAGNOSTICS_RAW_PAYLOAD_DEVICES
+            assert diagnostics["entry"]["title"] == REDACTED
+            assert diagnostics["entry"]["data"] == {
+                CONF_EMAIL: REDACTED,
+                CONF_REFRESH_TOKEN: REDACTED,
+            }
+            payloads = diagnostics["raw_payloads"]
+            assert len(payloads) == DIAGNOSTICS_RAW_PAYLOAD_DEVICES
+            for payload in payloads.values():
+                assert payload["serial"] == REDACTED
+                assert payload["node"]["name"] == REDACTED
+                assert payload["status"]["valve_state"] == "open"
+
+    asyncio.run(scenario())
@@ -0,0 +1,95 @@
+"""Tests for the flow rates derived from volume readings."""
+from custom_components.quandify.const import (
+    CONSUMPTION_RATE_WINDOW_MINUTES,
+    DEFAULT_MIN_POLL_INTERVAL_SECONDS,
+)
+from custom_components.quandify.flow import QuandifyFlowTracker
+
+
+def test_flow_rates() -> None:
+    """The flow rate is taken from the last two samples, the consumption rate from all."""
+    tracker = QuandifyFlowTracker(max_gap=600)
+    assert tracker.flow_rate("device") is None
+
+    tracker.add("device", 0, 100)
+    assert tracker.flow_rate("device") is None
+    assert tracker.consumption_rate("device") is None
+
+    tracker.add("device", 60, 100)
+    tracker.add("device", 120, 106)
+    assert tracker.flow_rate("device") == 6.0
+    assert tracker.consumption_rate("device") == 180.0
+
+
+def test_flow_ignores_missing_and_out_of_order_samples() -> None:
+    """A missing volume or a sample older than the last one is skipped."""
+    tracker = QuandifyFlowTracker(max_gap=600)
+    tracker.add("device", 0, 100)
+    tracker.add("device", 60, None)
+    tracker.add("device", 120, 112)
+    tracker.add("device", 90, 500)
+    assert tracker.as_dict() == {"device": [[0, 100], [120, 112]]}
+
+
+def test_flow_counter_decrease_restarts() -> None:
+    """A lower volume is a counter reset and never gives a negative rate."""
+    tracker = QuandifyFlowTracker(max_gap=600)
+    tracker.add("device", 0, 100)
+    tracker.add("device", 60, 110)
+    tracker.add("device", 120, 3)
+    assert tracker.flow_rate("device") is None
+
+    tracker.add("device", 180, 9)
+    assert tracker.flow_rate("device") == 6.0
+    assert tracker.consumption_rate("device") == 360.0
+
+
+def test_flow_gap_restarts() -> None:
+    """A gap longer than the maximum sample gap starts over rather than averaging across it."""
+    tracker = QuandifyFlowTracker(max_gap=600)
+    tracker.add("device", 0, 100)
+    tracker.add("device", 600, 160)
+    assert tracker.flow_rate("device") == 6.0
+
+    tracker.add("device", 1201, 1000)
+    assert tracker.flow_rate("device") is None
+    assert tracker.as_dict() == {"device": [[1201, 1000]]}
+
+
+def test_flow_window_covered_at_minimum_interval() -> None:
+    """Polled at the minimum interval, the default buffer covers the whole window."""
+    window = CONSUMPTION_RATE_WINDOW_MINUTES * 60
+    tracker = QuandifyFlowTracker(max_gap=600)
+    # Steady flow for the first hour, then none for the second
+    for index in range(2 * window // DEFAULT_MIN_POLL_INTERVAL_SECONDS + 1):
+        timestamp = index * DEFAULT_MIN_POLL_INTERVAL_SECONDS
+        tracker.add("device", timestamp, 100 + min(timestamp, window) / 60)
+
+        samples = tracker.as_dict()["device"]
+        if timestamp >= window:
+            assert samples[0][0] <= timestamp - window
+        assert samples[0][0] >= timestamp - window - DEFAULT_MIN_POLL_INTERVAL_SECONDS
+
+        if timestamp == window:
+            assert tracker.consumption_rate("device") == 60.0
+    assert tracker.consumption_rate("device") == 0.0
+
+
+def test_flow_restore() -> None:
+    """Samples saved with as_dict give the same rates once restored."""
+    tracker = QuandifyFlowTracker(max_gap=600)
+    for timestamp, volume in ((0, 100), (60, 103), (120, 109)):
+        tracker.add("device", timestamp, volume)
+    tracker.add("other", 0, 5)
+
+    restored = QuandifyFlowTracker(max_gap=600)
+    restored.restore(tracker.as_dict())
+    assert restored.as_dict() == tracker.as_dict()
+    assert restored.flow_rate("device") == tracker.flow_rate("device") == 6.0
+    assert restored.consumption_rate("device") == tracker.consumption_rate("device")
+
+    # A sample taken after the restore continues the buffer
+    restored.add("device", 180, 115)
+    assert restored.flow_rate("device") == 6.0
+    restored.forget("other")
+    assert "other" not in restored.as_dict()
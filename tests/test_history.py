@@ -0,0 +1,171 @@
+"""Tests for the import of historical consumption."""
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.quandify import history
+from custom_components.quandify.const import (
+    HISTORY_AGGREGATION_LAG_HOURS,
+    HISTORY_BACKFILL_DAYS,
+    HISTORY_CHUNK_HOURS,
+)
+from custom_components.quandify.history import QuandifyHistoryImporter
+from custom_components.quandify.models import QuandifyDevice
+
+from .conftest import async_test_home_assistant
+
+NOW = datetime(2024, 3, 20, 12, 30, tzinfo=timezone.utc)
+# The end of the last hour the import may fetch
+END = NOW.replace(minute=0) - timedelta(hours=HISTORY_AGGREGATION_LAG_HOURS)
+
+DEVICE = QuandifyDevice(
+    id="device-1",
+    name="Kitchen",
+    model="Water Grip",
+    serial=None,
+    firmware_version=None,
+    hardware_version=None,
+)
+
+
+class FakeHistoryAPI:
+    """Serve total volume samples, counting the requests."""
+
+    def __init__(self, samples: dict[datetime, float] | None = None):
+        """Initialize with the total volume at given times."""
+        self.samples = samples or {}
+        self.requests: list[tuple[datetime, datetime]] = []
+        self.error: Exception | None = None
+
+    async def iter_volume_history(
+        self, device_id: str, start: datetime, end: datetime
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the samples between start and end."""
+        self.requests.append((start, end))
+        if self.error is not None:
+            raise self.error
+        for timestamp, volume in sorted(self.samples.items()):
+            if start <= timestamp < end:
+                yield {"timestamp": timestamp.isoformat(), "total_volume": volume}
+
+
+@pytest.fixture(autouse=True)
+def _frozen_now(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Freeze the wall clock of the importer."""
+    monkeypatch.setattr(dt_util, "utcnow", lambda: NOW)
+
+
+@pytest.fixture
+def added(monkeypatch: pytest.MonkeyPatch) -> list[Any]:
+    """Collect the statistics passed to the recorder."""
+    statistics: list[Any] = []
+    monkeypatch.setattr(
+        history,
+        "async_add_external_statistics",
+        lambda hass, metadata, data: statistics.extend(data),
+    )
+    return statistics
+
+
+def _run_import(
+    config_dir: Path, api: FakeHistoryAPI, checkpoints: dict[str, Any] | None = None
+) -> QuandifyHistoryImporter:
+    """Run one import against the fake API and return the importer."""
+    importer: QuandifyHistoryImporter
+
+    async def scenario() -> None:
+        nonlocal importer
+        async with async_test_home_assistant(config_dir) as hass:
+            coordinator = MagicMock(devices=[DEVICE], api=api)
+            importer = QuandifyHistoryImporter(hass, coordinator, MagicMock(entry_id="entry"))
+            importer._checkpoints = dict(checkpoints or {})
+            await importer.async_import()
+
+    asyncio.run(scenario())
+    return importer
+
+
+def test_empty_chunks_before_lag_advance_checkpoint(tmp_path: Path, added: list[Any]) -> None:
+    """A device without data is not asked for its whole backfill again."""
+    api = FakeHistoryAPI()
+    importer = _run_import(tmp_path, api)
+
+    assert len(api.requests) == HISTORY_BACKFILL_DAYS * 24 // HISTORY_CHUNK_HOURS
+    assert added == []
+    last_chunk_start = END - timedelta(hours=HISTORY_CHUNK_HOURS)
+    assert importer._checkpoints[DEVICE.id]["end"] == last_chunk_start.isoformat()
+
+    api.requests.clear()
+    _run_import(tmp_path, api, importer._checkpoints)
+    assert api.requests == [(last_chunk_start, END)]
+
+
+def test_checkpoint_stops_after_last_hour_with_data(tmp_path: Path, added: list[Any]) -> None:
+    """In the last chunk the checkpoint only moves past hours that returned data."""
+    start = END - timedelta(hours=10)
+    api = FakeHistoryAPI({start + timedelta(minutes=30): 100.0, start + timedelta(hours=3): 110.0})
+    importer = _run_import(
+        tmp_path, api, {DEVICE.id: {"end": start.isoformat(), "state": 90.0, "sum": 40.0}}
+    )
+
+    assert api.requests == [(start, END)]
+    assert [(stat["start"], stat["state"], stat["sum"]) for stat in added] == [
+        (start, 100.0, 50.0),
+        (start + timedelta(hours=3), 110.0, 60.0),
+    ]
+    assert importer._checkpoints[DEVICE.id] == {
+        "end": (start + timedelta(hours=4)).isoformat(),
+        "state": 110.0,
+        "sum": 60.0,
+    }
+
+
+def test_sum_keeps_growing_over_meter_reset(tmp_path: Path, added: list[Any]) -> None:
+    """A lower total volume counts as consumption since a reset, not a negative one."""
+    start = END - timedelta(hours=4)
+    api = FakeHistoryAPI(
+        {
+            start: 500.0,
+            start + timedelta(hours=1): 520.0,
+            start + timedelta(hours=2): 5.0,
+            start + timedelta(hours=3): 15.0,
+        }
+    )
+    _run_import(tmp_path, api, {DEVICE.id: {"end": start.isoformat()}})
+
+    assert [stat["sum"] for stat in added] == [500.0, 520.0, 525.0, 535.0]
+
+
+def test_rejected_request_suspends_import(
+    tmp_path: Path, added: list[Any], caplog: pytest.LogCaptureFixture
+) -> None:
+    """A 4xx stops the import for a while and is only warned about once."""
+    api = FakeHistoryAPI()
+    api.error = aiohttp.ClientResponseError(MagicMock(), (), status=404)
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            coordinator = MagicMock(devices=[DEVICE, DEVICE], api=api)
+            importer = QuandifyHistoryImporter(hass, coordinator, MagicMock(entry_id="entry"))
+
+            await importer.async_import()
+            assert len(api.requests) == 1
+            await importer.async_import()
+            assert len(api.requests) == 1
+
+            # Retried once the wait is over, without a second warning
+            importer._retry_at = 0
+            await importer.async_import()
+            assert len(api.requests) == 2
+
+    asyncio.run(scenario())
+    warnings = [record for record in caplog.records if record.levelname == "WARNING"]
+    assert len(warnings) == 1
+    assert "404" in warnings[0].getMessage()
@@ -0,0 +1,150 @@
+"""Tests for the hub shared by the config entries of an organization."""
+import asyncio
+import time
+from pathlib import Path
+
+from custom_components.quandify.const import DEVICE_REMOVAL_LISTINGS
+from custom_components.quandify.models import QuandifyDevice
+
+from .conftest import (
+    FakeQuandifyAPI,
+    async_test_home_assistant,
+    async_test_hub,
+    async_wait_for,
+    make_coordinator,
+)
+from mock_cloud import make_device
+
+
+def test_polling_handed_over(tmp_path: Path) -> None:
+    """Only the first coordinator polls and provides device entities, until it is removed."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            async with async_test_hub(hass, fake_api) as hub:
+                first = make_coordinator(hass, hub)
+                second = make_coordinator(hass, hub)
+                remove_first = hub.async_add_coordinator(first)
+                hub.async_add_coordinator(second)
+                assert first.polling
+                assert not second.polling
+                assert second.update_interval is None
+
+                provided: dict[str, list[list[QuandifyDevice]]] = {"first": [], "second": []}
+                first.async_add_device_listener(provided["first"].append)
+                second.async_add_device_listener(provided["second"].append)
+                assert provided == {"first": [first.devices], "second": []}
+
+                remove_first()
+                assert second.polling
+                assert second.update_interval is not None
+                assert provided["second"] == [second.devices]
+
+    asyncio.run(scenario())
+
+
+def test_results_published_to_other_coordinators(tmp_path: Path) -> None:
+    """The devices one coordinator fetches update the others without requests of their own."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            healthy, failing = fake_api.payloads
+            async with async_test_hub(hass, fake_api) as hub:
+                polling = make_coordinator(hass, hub)
+                other = make_coordinator(hass, hub)
+                hub.async_add_coordinator(polling)
+                hub.async_add_coordinator(other)
+
+                fake_api.failing.add(failing)
+                await polling.async_refresh()
+                assert fake_api.calls["get_device_info"] == 2
+                assert other.data == {healthy: polling.data[healthy]}
+                assert other.is_device_available(healthy)
+                assert not other.is_device_available(failing)
+                assert failing in other.device_errors
+                # Its own cycles are not mixed into the other's flight recorder
+                assert other.recorder.as_list() == []
+
+    asyncio.run(scenario())
+
+
+def test_device_removed_after_missing_listings(tmp_path: Path) -> None:
+    """A device is only removed once it is missing from several lists in a row."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=2)
+            kept, removed = fake_api.devices
+            async with async_test_hub(hass, fake_api) as hub:
+                coordinator = make_coordinator(hass, hub)
+                await coordinator.async_refresh()
+                added: list[list[QuandifyDevice]] = []
+                coordinator.async_add_device_listener(added.append)
+                added.clear()
+
+                async def sync(*payloads: dict) -> None:
+                    listed = {
+                        payload["id"]: (QuandifyDevice.from_api(payload), None)
+                        for payload in payloads
+                    }
+                    await coordinator._async_sync_devices(listed, time.monotonic())
+
+                # An empty list and a device that is back in time are ignored
+                await sync()
+                await sync(fake_api.payloads[kept.id])
+                await sync(fake_api.payloads[kept.id], fake_api.payloads[removed.id])
+                for _ in range(DEVICE_REMOVAL_LISTINGS - 1):
+                    await sync(fake_api.payloads[kept.id])
+                assert [device.id for device in coordinator.devices] == [kept.id, removed.id]
+
+                await sync(fake_api.payloads[kept.id])
+                assert [device.id for device in coordinator.devices] == [kept.id]
+                assert set(coordinator.data) == {kept.id}
+                assert not coordinator.is_device_available(removed.id)
+                assert added == []
+
+                # A new device is fetched if the list lacks its state, and announced
+                new = make_device(2)
+                fake_api.payloads[new["id"]] = new
+                await sync(fake_api.payloads[kept.id], new)
+                assert [device.id for device in added[0]] == [new["id"]]
+                assert coordinator.is_device_available(new["id"])
+
+    asyncio.run(scenario())
+
+
+def test_one_event_stream_per_organization(tmp_path: Path) -> None:
+    """The event stream runs once, for the polling coordinator, and moves along with polling."""
+
+    async def scenario() -> None:
+        async with async_test_home_assistant(tmp_path) as hass:
+            fake_api = FakeQuandifyAPI(devices=1)
+            device_id = next(iter(fake_api.payloads))
+            async with async_test_hub(hass, fake_api) as hub:
+                first = make_coordinator(hass, hub, push_updates=True)
+                second = make_coordinator(hass, hub, push_updates=True)
+                await first.async_refresh()
+                await second.async_refresh()
+                remove_first = hub.async_add_coordinator(first)
+                hub.async_add_coordinator(second)
+
+                await async_wait_for(lambda: first.push_connected)
+                assert fake_api.calls["iter_events"] == 1
+                assert not second.push_connected
+
+                fake_api.events.put_nowait({"id": device_id, "status": {"total_volume": 2000}})
+                await async_wait_for(lambda: first.data[device_id].total_volume == 2000)
+                assert second.data[device_id].total_volume == 2000
+
+                remove_first()
+                await async_wait_for(lambda: second.push_connected)
+                assert not first.push_connected
+                assert fake_api.calls["iter_events"] == 2
+
+                second.async_update_options(push_updates=False)
+                await async_wait_for(lambda: not second.push_connected)
+                await second.async_shutdown()
+
+    asyncio.run(scenario())